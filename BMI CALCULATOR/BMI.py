@@ -1,30 +1,13 @@
+import argparse
+import csv
+import itertools
+import json
+import math
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-
-def calculate_bmi(weight_kg, height_m):
-    """
-    Calculates the Body Mass Index (BMI) using the formula: BMI = weight (kg) / height^2 (m^2).
-    """
-    if height_m <= 0 or weight_kg <= 0:
-        raise ValueError("Height and weight must be positive values for BMI calculation.")
-
-    # BMI formula
-    bmi = weight_kg / (height_m ** 2)
-    return bmi
-
-
-def classify_bmi(bmi):
-    """
-    Classifies the BMI result into standard categories based on WHO standards.
-    """
-    if bmi < 18.5:
-        return "Underweight"
-    elif 18.5 <= bmi < 24.9:
-        return "Normal weight"
-    elif 25 <= bmi < 29.9:
-        return "Overweight"
-    else:  # bmi >= 30.0
-        return "Obesity"
+from bmi_core import calculate_bmi, classify_bmi, get_scheme, SCHEMES
 
 
 def get_valid_float_input(prompt):
@@ -45,10 +28,153 @@ def get_valid_float_input(prompt):
             sys.exit(0)
 
 
+# --- Streaming (Non-Interactive) Mode ---
+
+def read_csv_rows(stream):
+    """Yields (weight, height) raw values from a CSV stream with 'weight' and 'height' columns."""
+    for row in csv.DictReader(stream):
+        yield row.get('weight'), row.get('height')
+
+
+def read_ndjson_rows(stream):
+    """Yields (weight, height) raw values from a stream with one JSON object per line."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = {}
+        if not isinstance(record, dict):
+            record = {}
+        yield record.get('weight'), record.get('height')
+
+
+def chunked(rows, size):
+    """Groups an iterable into lists of at most `size` items without materializing it."""
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_chunk(chunk, scheme_name=None):
+    """
+    Calculates and classifies a chunk of raw (weight, height) rows.
+    Returns (weight, height, bmi, category, error) tuples; bad rows carry an error instead of failing the chunk.
+    """
+    scheme = get_scheme(scheme_name)
+    results = []
+    for raw_weight, raw_height in chunk:
+        try:
+            weight = float(raw_weight)
+            height = float(raw_height)
+        except (TypeError, ValueError):
+            results.append((raw_weight, raw_height, '', '', "Invalid input format."))
+            continue
+        # float() accepts "nan" and "inf"; NaN would also be classified into the last category.
+        if not (math.isfinite(weight) and math.isfinite(height)):
+            results.append((raw_weight, raw_height, '', '', "Invalid input format."))
+            continue
+
+        try:
+            bmi = calculate_bmi(weight, height)
+        except ValueError as e:
+            results.append((weight, height, '', '', str(e)))
+            continue
+        except (ZeroDivisionError, OverflowError):
+            bmi = math.inf
+        if not (math.isfinite(bmi) and bmi > 0):
+            results.append((weight, height, '', '', "BMI is out of range for these values."))
+            continue
+        results.append((weight, height, round(bmi, 2), classify_bmi(bmi, scheme), ''))
+    return results
+
+
+def process_stream(rows, chunk_size=10000, workers=1, scheme_name=None):
+    """
+    Generator pipeline: rows -> chunks -> (optionally parallel) processing -> result rows.
+    At most `workers * 2` chunks are in flight, so memory stays flat for any input size.
+    """
+    chunks = chunked(rows, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from process_chunk(chunk, scheme_name)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(process_chunk, chunk, scheme_name))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        for future in pending:
+            yield from future.result()
+
+
+def write_csv_results(results, stream):
+    writer = csv.writer(stream)
+    writer.writerow(['weight', 'height', 'bmi', 'category', 'error'])
+    for row in results:
+        writer.writerow(row)
+
+
+def write_ndjson_results(results, stream):
+    for weight, height, bmi, category, error in results:
+        record = {"weight": weight, "height": height}
+        if error:
+            record["error"] = error
+        else:
+            record["bmi"] = bmi
+            record["category"] = category
+        stream.write(json.dumps(record) + "\n")
+
+
+def run_batch(input_path, output_path='-', fmt=None, chunk_size=10000, workers=1, scheme_name=None):
+    """
+    Streams a CSV or NDJSON file ('-' for stdin) through the BMI pipeline.
+    Heights are in meters, as in interactive mode.
+    """
+    if fmt is None:
+        fmt = 'ndjson' if input_path.endswith(('.ndjson', '.jsonl')) else 'csv'
+    reader = read_ndjson_rows if fmt == 'ndjson' else read_csv_rows
+    writer = write_ndjson_results if fmt == 'ndjson' else write_csv_results
+
+    source = sys.stdin if input_path == '-' else open(input_path, newline='', encoding='utf-8')
+    sink = sys.stdout if output_path == '-' else open(output_path, 'w', newline='', encoding='utf-8')
+    try:
+        writer(process_stream(reader(source), chunk_size, workers, scheme_name), sink)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Body Mass Index (BMI) calculator.")
+    parser.add_argument('--input', '-i', help="CSV or NDJSON file of weight (kg) / height (m) rows, or '-' for stdin. "
+                                              "Omit for interactive mode.")
+    parser.add_argument('--output', '-o', default='-', help="Output file (default: stdout).")
+    parser.add_argument('--format', '-f', choices=['csv', 'ndjson'], help="Input/output format (default: from extension, else csv).")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Rows per processing chunk.")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for chunk processing.")
+    parser.add_argument('--scheme', choices=sorted(SCHEMES), default='who', help="BMI category cut-offs (default: who).")
+    return parser.parse_args(argv)
+
+
 def main():
     """
     Main function to run the BMI calculator program.
     """
+    args = parse_args()
+    if args.input:
+        run_batch(args.input, args.output, args.format, args.chunk_size, args.workers, args.scheme)
+        return
+
     print("=" * 40)
     print("--- Body Mass Index (BMI) Calculator ---")
     print("  Input required: Weight (kg), Height (m)")
@@ -61,7 +187,7 @@ def main():
     try:
         # Calculate and classify
         bmi_result = calculate_bmi(weight, height)
-        category = classify_bmi(bmi_result)
+        category = classify_bmi(bmi_result, get_scheme(args.scheme))
 
         # Print results
         print("\n" + "=" * 40)
@@ -1,27 +1,185 @@
-from flask import Flask, request, jsonify, render_template
+import hashlib
+import math
+import os
+
+import numpy as np
+from flask import Flask, request, jsonify, render_template, make_response
+
+from bmi_core import calculate_bmi, classify_bmi, get_scheme, DEFAULT_SCHEME
+from bmi_stats import BMIAggregator, SnapshotStore
+from result_cache import TTLCache
 
 # The Flask application instance
 app = Flask(__name__)
 
 
 # --- Core BMI Logic ---
-def calculate_bmi(weight_kg: float, height_m: float) -> float:
-    """Calculates BMI: weight (kg) / height (m)^2."""
-    if height_m <= 0:
-        raise ValueError("Height must be positive.")
-    return weight_kg / (height_m ** 2)
+# calculate_bmi and the category tables live in bmi_core, shared with the CLI.
 
-
-def interpret_bmi(bmi: float) -> str:
+def interpret_bmi(bmi: float, scheme=DEFAULT_SCHEME) -> str:
     """Interprets the BMI value to determine the weight category."""
-    if bmi < 18.5:
-        return "Underweight"
-    elif 18.5 <= bmi <= 24.9:
-        return "Normal weight"
-    elif 25.0 <= bmi <= 29.9:
-        return "Overweight"
+    return classify_bmi(bmi, scheme)
+
+
+# --- Vectorized BMI Logic (Batch) ---
+
+def calculate_bmi_batch(weights_kg, heights_m):
+    """
+    Calculates BMI for many rows at once.
+    Returns (bmi, valid) arrays; invalid rows (non-positive or missing values, or a
+    result that overflows or underflows) are NaN in bmi.
+    """
+    weights = np.asarray(weights_kg, dtype=float)
+    heights = np.asarray(heights_m, dtype=float)
+    if weights.shape != heights.shape:
+        raise ValueError("Weights and heights must have the same length.")
+
+    valid = (weights > 0) & (heights > 0)
+    bmi = np.full(weights.shape, np.nan)
+    with np.errstate(over='ignore', under='ignore'):
+        np.divide(weights, heights ** 2, out=bmi, where=valid)
+    valid &= np.isfinite(bmi) & (bmi > 0)
+    bmi[~valid] = np.nan
+    return bmi, valid
+
+
+def interpret_bmi_batch(bmi_values, scheme=DEFAULT_SCHEME):
+    """
+    Interprets an array of BMI values, returning an array of category names.
+    np.digitize(right=False) matches the bisect_right lookup used for scalars.
+    """
+    categories = np.array(scheme.categories, dtype=object)
+    return categories[np.digitize(bmi_values, scheme.thresholds)]
+
+
+def _to_float_column(values, columnar=True):
+    """
+    Converts a flat column of JSON values to a 1-D float array.
+    Numbers and numeric strings are accepted (as in /calculate); missing, non-numeric
+    and non-finite entries become NaN and are reported as (index, message) errors.
+    A columnar payload that is not a flat list raises ValueError; a column gathered
+    from records reports nested values per row instead.
+    """
+    try:
+        column = np.asarray(values)
+    except ValueError:
+        column = None   # ragged nested lists
+    if column is None or column.ndim != 1:
+        if columnar:
+            raise ValueError("Each column must be a flat list of numbers.")
+    elif column.dtype.kind in 'iuf':
+        # All plain numbers (JSON booleans give kind 'b', nulls and strings 'O'/'U').
+        # json.loads accepts NaN and Infinity, so finiteness is still checked per row.
+        column = column.astype(float)
+        finite = np.isfinite(column)
+        if finite.all():
+            return column, []
+        column[~finite] = np.nan
+        return column, [(i, "Invalid input format. Please use numbers.") for i in np.flatnonzero(~finite).tolist()]
+
+    column = np.empty(len(values))
+    errors = []
+    for i, value in enumerate(values):
+        column[i] = np.nan
+        if value is None:
+            errors.append((i, "Missing value. Please provide a number."))
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            errors.append((i, "Invalid input format. Please use numbers."))
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            errors.append((i, "Invalid input format. Please use numbers."))
+            continue
+        if not np.isfinite(number):
+            errors.append((i, "Invalid input format. Please use numbers."))
+            continue
+        column[i] = number
+    return column, errors
+
+
+def _parse_batch_payload(data):
+    """
+    Accepts a JSON array of {weight, height} records, {"records": [...]},
+    or a columnar {"weight": [...], "height": [...]} payload.
+    Rows may carry a 'group' key (a 'group' column when columnar).
+    Returns (weights_kg, heights_cm, groups, errors) where groups is a per-row list or None,
+    and errors maps row index -> message.
+    """
+    if isinstance(data, dict) and "records" in data:
+        data = data["records"]
+
+    groups = None
+    columnar = not isinstance(data, list)
+    if isinstance(data, list):
+        weights, heights, groups = [], [], []
+        for record in data:
+            record = record if isinstance(record, dict) else {}
+            weights.append(record.get('weight'))
+            heights.append(record.get('height'))
+            groups.append(record.get('group'))
+        if not any(group is not None for group in groups):
+            groups = None
+    elif isinstance(data, dict) and isinstance(data.get('weight'), list) and isinstance(data.get('height'), list):
+        weights, heights = data['weight'], data['height']
+        if len(weights) != len(heights):
+            raise ValueError("'weight' and 'height' columns must have the same length.")
+        if isinstance(data.get('group'), list):
+            groups = data['group']
+            if len(groups) != len(weights):
+                raise ValueError("'group' column must have the same length as 'weight' and 'height'.")
+    else:
+        raise ValueError("Expected a JSON array of records or 'weight'/'height' arrays.")
+
+    weights_kg, weight_errors = _to_float_column(weights, columnar)
+    heights_cm, height_errors = _to_float_column(heights, columnar)
+    errors = dict(height_errors)
+    errors.update(weight_errors)
+    return weights_kg, heights_cm, groups, errors
+
+
+# --- Population Statistics ---
+
+# Every successful measurement (single or batch) feeds the aggregate; summaries never rescan data.
+AGGREGATOR = BMIAggregator()
+
+# With several worker processes, set BMI_STATS_DIR to a shared directory so /stats merges all workers.
+STATS_STORE = SnapshotStore(os.environ['BMI_STATS_DIR']) if os.environ.get('BMI_STATS_DIR') else None
+
+
+def record_measurements(values, categories, groups=None, default_group=None):
+    """Adds BMI values to the aggregate, split by per-row group (falling back to `default_group`)."""
+    if groups is None:
+        AGGREGATOR.record_many(values, categories, default_group)
     else:
-        return "Obesity"
+        by_group = {}
+        for value, category, group in zip(values, categories, groups):
+            group = default_group if group is None else str(group)
+            group_values, group_categories = by_group.setdefault(group, ([], []))
+            group_values.append(value)
+            group_categories.append(category)
+        for group, (group_values, group_categories) in by_group.items():
+            AGGREGATOR.record_many(group_values, group_categories, group)
+
+    if STATS_STORE is not None:
+        STATS_STORE.maybe_write(AGGREGATOR)
+
+
+# --- Result Cache ---
+
+# Most requests repeat a small set of integer kg/cm pairs, so finished response bodies are memoized.
+RESULT_CACHE = TTLCache(
+    max_size=int(os.environ.get('BMI_CACHE_SIZE', '4096')),
+    ttl=float(os.environ.get('BMI_CACHE_TTL', '3600')),
+)
+
+
+def _quantize(value):
+    """Normalizes a JSON number or numeric string to 0.01 precision (ints pass through unparsed)."""
+    if type(value) is int:
+        return value
+    return round(float(value), 2)
 
 
 # --- API Endpoint (Backend Logic) ---
@@ -29,39 +187,148 @@ def interpret_bmi(bmi: float) -> str:
 # This endpoint handles the actual calculation request from the frontend JS
 @app.route('/calculate', methods=['POST'])
 def handle_calculation():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object."}), 400
+
     try:
-        data = request.get_json()
-        weight_kg = float(data.get('weight'))
-        height_cm = float(data.get('height'))
+        try:
+            scheme = get_scheme(data.get('scheme'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # 70, 70.0 and "70" all quantize to keys that compare and hash equal.
+        weight_kg = _quantize(data.get('weight'))
+        height_cm = _quantize(data.get('height'))
+        cache_key = (weight_kg, height_cm, scheme.name)
 
-        if weight_kg <= 0 or height_cm <= 0:
-            return jsonify({"error": "Input must be positive."}), 400
+        cached = RESULT_CACHE.get(cache_key)
+        if cached is None:
+            # NaN and inf ("nan" strings, JSON NaN/Infinity) would be cached and poison the stats.
+            if not (math.isfinite(weight_kg) and math.isfinite(height_cm)):
+                return jsonify({"error": "Invalid input format. Please use numbers."}), 400
+            if weight_kg <= 0 or height_cm <= 0:
+                return jsonify({"error": "Input must be positive."}), 400
 
-        height_m = height_cm / 100
+            height_m = height_cm / 100
 
-        bmi_value = calculate_bmi(weight_kg, height_m)
-        category = interpret_bmi(bmi_value)
+            try:
+                bmi_value = calculate_bmi(weight_kg, height_m)
+            except (ZeroDivisionError, OverflowError):
+                bmi_value = math.inf
+            if not (math.isfinite(bmi_value) and bmi_value > 0):
+                return jsonify({"error": "Input is out of range."}), 400
+            category = interpret_bmi(bmi_value, scheme)
+
+            body = jsonify({
+                "bmi": round(bmi_value, 2),
+                "category": category,
+                "success": True
+            }).get_data()
+            cached = (body, bmi_value, category)
+            RESULT_CACHE.set(cache_key, cached)
+
+        body, bmi_value, category = cached
+        record_measurements([bmi_value], [category], default_group=data.get('group'))
+        return app.response_class(body, mimetype='application/json')
+
+    except (TypeError, ValueError):
+        # TypeError covers missing fields (float(None)) and non-scalar values.
+        return jsonify({"error": "Invalid input format. Please use numbers."}), 400
+    except Exception:
+        return jsonify({"error": "An unexpected server error occurred."}), 500
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss/eviction counters of the /calculate result cache (per worker process)."""
+    return jsonify(RESULT_CACHE.stats())
+
+
+# Batch variant of /calculate: one request, many rows, per-row errors.
+@app.route('/calculate/batch', methods=['POST'])
+def handle_batch_calculation():
+    data = request.get_json(silent=True)
+    if data is None:
+        return jsonify({"error": "Missing JSON in request"}), 400
+
+    try:
+        scheme = get_scheme(data.get('scheme') if isinstance(data, dict) else None)
+        default_group = data.get('group') if isinstance(data, dict) and not isinstance(data.get('group'), list) else None
+        weights_kg, heights_cm, groups, errors = _parse_batch_payload(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        bmi_values, valid = calculate_bmi_batch(weights_kg, heights_cm / 100)
+        categories = interpret_bmi_batch(bmi_values, scheme)
+
+        positive = ((weights_kg > 0) & (heights_cm > 0)).tolist()
+        results = []
+        for i, (bmi, category, ok) in enumerate(zip(np.round(bmi_values, 2).tolist(), categories.tolist(), valid.tolist())):
+            if ok:
+                results.append({"bmi": bmi, "category": category})
+            elif i in errors:
+                results.append({"error": errors[i]})
+            else:
+                results.append({"error": "Input is out of range." if positive[i] else "Input must be positive."})
+
+        valid_groups = None if groups is None else [group for group, ok in zip(groups, valid.tolist()) if ok]
+        record_measurements(bmi_values[valid].tolist(), categories[valid].tolist(), valid_groups, default_group)
 
         return jsonify({
-            "bmi": round(bmi_value, 2),
-            "category": category,
+            "results": results,
+            "count": len(results),
+            "errors": int((~valid).sum()),
             "success": True
         })
 
-    except ValueError:
-        return jsonify({"error": "Invalid input format. Please use numbers."}), 400
     except Exception:
         return jsonify({"error": "An unexpected server error occurred."}), 500
 
 
+# Population summaries: GET /stats for the overall picture, /stats?group=<key> for one group.
+@app.route('/stats', methods=['GET'])
+def population_stats():
+    aggregator = STATS_STORE.merged(AGGREGATOR) if STATS_STORE is not None else AGGREGATOR
+    group = request.args.get('group')
+    if group is not None:
+        return jsonify({"group": group, **aggregator.summary(group)})
+    return jsonify({"overall": aggregator.summary(), "groups": aggregator.groups()})
+
+
+# Raw, mergeable state of this worker (combine several with BMIAggregator.from_snapshots).
+@app.route('/stats/snapshot', methods=['GET'])
+def stats_snapshot():
+    return jsonify(AGGREGATOR.snapshot())
+
+
 # --- Frontend Serving (Root Route) ---
 
+# Seconds browsers and proxies may reuse the page before revalidating with its ETag.
+INDEX_MAX_AGE = int(os.environ.get('BMI_INDEX_MAX_AGE', '300'))
+_index_cache = {}
+
+
 # This route serves the HTML file located in the 'templates' folder when the user visits the root URL.
+# The page is static, so it is rendered once per process and revalidated via ETag.
 @app.route('/')
 def index():
-    return render_template('index.html')
+    cached = None if app.debug else _index_cache.get('index.html')
+    if cached is None:
+        body = render_template('index.html')
+        cached = (body, hashlib.sha1(body.encode('utf-8')).hexdigest())
+        _index_cache['index.html'] = cached
+
+    body, etag = cached
+    response = make_response(body)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = INDEX_MAX_AGE
+    return response.make_conditional(request)
 
 
 if __name__ == '__main__':
+    # Development server only; use serve.py for a multi-worker production server.
     # host='0.0.0.0' makes the server accessible from any device on your network
     app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
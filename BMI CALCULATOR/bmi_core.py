@@ -0,0 +1,82 @@
+"""
+Shared BMI logic used by both the CLI (BMI.py) and the Flask app (app.py).
+
+Categories are defined by a sorted table of lower bounds and looked up with
+bisect, so every caller classifies a given value the same way.
+"""
+import bisect
+
+
+class BMIScheme:
+    """
+    A BMI category scheme: `thresholds[i]` is the lower bound of `categories[i + 1]`.
+    A value equal to a threshold belongs to the higher category.
+    """
+    __slots__ = ('name', 'thresholds', 'categories')
+
+    def __init__(self, name, thresholds, categories):
+        thresholds = tuple(float(t) for t in thresholds)
+        if list(thresholds) != sorted(thresholds):
+            raise ValueError("BMI thresholds must be sorted in ascending order.")
+        if len(categories) != len(thresholds) + 1:
+            raise ValueError("A BMI scheme needs exactly one more category than thresholds.")
+        self.name = name
+        self.thresholds = thresholds
+        self.categories = tuple(categories)
+
+    def classify(self, bmi):
+        return self.categories[bisect.bisect_right(self.thresholds, bmi)]
+
+    def __repr__(self):
+        return f"BMIScheme({self.name!r}, {self.thresholds!r}, {self.categories!r})"
+
+
+# --- Category Tables ---
+
+WHO_ADULT = BMIScheme(
+    'who',
+    [18.5, 25.0, 30.0],
+    ["Underweight", "Normal weight", "Overweight", "Obesity"],
+)
+
+# WHO expert consultation cut-offs for Asian populations.
+WHO_ASIAN = BMIScheme(
+    'asian',
+    [18.5, 23.0, 27.5],
+    ["Underweight", "Normal weight", "Overweight", "Obesity"],
+)
+
+SCHEMES = {scheme.name: scheme for scheme in (WHO_ADULT, WHO_ASIAN)}
+DEFAULT_SCHEME = WHO_ADULT
+
+
+def get_scheme(name=None):
+    """Returns the scheme registered under `name` (default: WHO adult)."""
+    if name is None:
+        return DEFAULT_SCHEME
+    try:
+        return SCHEMES[str(name).lower()]
+    except KeyError:
+        raise ValueError(f"Unknown BMI scheme '{name}'. Available: {', '.join(sorted(SCHEMES))}.")
+
+
+def register_scheme(scheme):
+    """Adds a custom category scheme so it can be selected by name."""
+    SCHEMES[scheme.name] = scheme
+    return scheme
+
+
+# --- Core BMI Logic ---
+
+def calculate_bmi(weight_kg, height_m):
+    """
+    Calculates the Body Mass Index (BMI) using the formula: BMI = weight (kg) / height^2 (m^2).
+    """
+    if height_m <= 0 or weight_kg <= 0:
+        raise ValueError("Height and weight must be positive values for BMI calculation.")
+    return weight_kg / (height_m ** 2)
+
+
+def classify_bmi(bmi, scheme=DEFAULT_SCHEME):
+    """Classifies a BMI value into a category of the given scheme (O(log n) per value)."""
+    return scheme.classify(bmi)
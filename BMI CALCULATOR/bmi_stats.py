@@ -0,0 +1,373 @@
+"""
+Incremental population statistics over BMI measurements.
+
+Every structure here is mergeable: per-worker aggregates can be combined into
+one without revisiting raw data, and summaries are computed from a fixed-size
+state (counts, moments and ~100 histogram buckets) rather than by rescanning.
+"""
+import glob
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+OVERALL = '__all__'
+
+
+def check_bmi(value):
+    """Raises ValueError unless `value` is a positive finite number; NaN or inf would poison every summary."""
+    if not (math.isfinite(value) and value > 0):
+        raise ValueError(f"BMI values must be positive finite numbers, got {value!r}.")
+    return value
+
+
+class RunningStats:
+    """Streaming count/mean/variance/min/max (Welford), mergeable with Chan's formula."""
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        check_bmi(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def add_many(self, values):
+        """Adds a batch with a two-pass computation, then merges it in. All values are checked first."""
+        values = [check_bmi(value) for value in values]
+        if not values:
+            return
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = math.fsum(values) / batch.count
+        batch.m2 = math.fsum((v - batch.mean) ** 2 for v in values)
+        batch.min = min(values)
+        batch.max = max(values)
+        self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        """Sample variance (n - 1 denominator)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2,
+                "min": self.min if self.count else None, "max": self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data["count"]
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        stats.min = data["min"] if data["min"] is not None else math.inf
+        stats.max = data["max"] if data["max"] is not None else -math.inf
+        return stats
+
+
+class QuantileSketch:
+    """
+    Log-bucketed histogram (DDSketch-style): quantiles within `relative_accuracy`
+    of the true value, merged by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.count = 0
+
+    def index(self, value):
+        """The bucket of `value`; raises ValueError for values the sketch cannot hold."""
+        return math.ceil(math.log(check_bmi(value)) / self._log_gamma)
+
+    def add(self, value, count=1):
+        self.add_index(self.index(value), count)
+
+    def add_index(self, index, count=1):
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy.")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {"relative_accuracy": self.relative_accuracy,
+                "buckets": {str(k): v for k, v in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["relative_accuracy"])
+        for index, count in data["buckets"].items():
+            sketch.buckets[int(index)] = count
+            sketch.count += count
+        return sketch
+
+
+class GroupAggregate:
+    """Moments, quantile sketch and category histogram for one group."""
+    __slots__ = ('stats', 'sketch', 'categories')
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch()
+        self.categories = {}
+
+    # Bucket indexes are computed (and values checked) before anything changes,
+    # so a rejected value leaves the aggregate exactly as it was.
+
+    def add(self, bmi, category):
+        index = self.sketch.index(bmi)
+        self.stats.add(bmi)
+        self.sketch.add_index(index)
+        self.categories[category] = self.categories.get(category, 0) + 1
+
+    def add_many(self, values, categories):
+        indexes = [self.sketch.index(value) for value in values]
+        self.stats.add_many(values)
+        for index in indexes:
+            self.sketch.add_index(index)
+        for category in categories:
+            self.categories[category] = self.categories.get(category, 0) + 1
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+        for category, count in other.categories.items():
+            self.categories[category] = self.categories.get(category, 0) + count
+
+    def summary(self, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95, 0.99)):
+        stats = self.stats
+        return {
+            "count": stats.count,
+            "mean": round(stats.mean, 4) if stats.count else None,
+            "variance": round(stats.variance, 4),
+            "stddev": round(math.sqrt(stats.variance), 4),
+            "min": round(stats.min, 2) if stats.count else None,
+            "max": round(stats.max, 2) if stats.count else None,
+            "percentiles": {
+                f"p{round(q * 100):g}": (round(v, 2) if v is not None else None)
+                for q, v in ((q, self.sketch.quantile(q)) for q in quantiles)
+            },
+            "categories": dict(self.categories),
+        }
+
+    def to_dict(self):
+        return {"stats": self.stats.to_dict(), "sketch": self.sketch.to_dict(), "categories": self.categories}
+
+    @classmethod
+    def from_dict(cls, data):
+        group = cls()
+        group.stats = RunningStats.from_dict(data["stats"])
+        group.sketch = QuantileSketch.from_dict(data["sketch"])
+        group.categories = dict(data["categories"])
+        return group
+
+
+class BMIAggregator:
+    """
+    Thread-safe aggregate of all measurements, overall and per grouping key.
+    Snapshots are plain JSON, so aggregates from several workers can be merged.
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def _group(self, key):
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = GroupAggregate()
+        return group
+
+    def record(self, bmi, category, group=None):
+        with self._lock:
+            self._group(OVERALL).add(bmi, category)
+            if group is not None:
+                self._group(str(group)).add(bmi, category)
+
+    def record_many(self, values, categories, group=None):
+        values, categories = list(values), list(categories)
+        if not values:
+            return
+        with self._lock:
+            self._group(OVERALL).add_many(values, categories)
+            if group is not None:
+                self._group(str(group)).add_many(values, categories)
+
+    def groups(self):
+        with self._lock:
+            return sorted(key for key in self._groups if key != OVERALL)
+
+    def summary(self, group=None):
+        with self._lock:
+            aggregate = self._groups.get(OVERALL if group is None else str(group))
+            return (aggregate or GroupAggregate()).summary()
+
+    def snapshot(self):
+        with self._lock:
+            return {key: group.to_dict() for key, group in self._groups.items()}
+
+    def merge_snapshot(self, snapshot):
+        with self._lock:
+            for key, data in snapshot.items():
+                self._group(key).merge(GroupAggregate.from_dict(data))
+
+    @classmethod
+    def from_snapshots(cls, snapshots):
+        aggregator = cls()
+        for snapshot in snapshots:
+            aggregator.merge_snapshot(snapshot)
+        return aggregator
+
+
+class SnapshotStore:
+    """
+    Shares aggregates between worker processes through a directory: each
+    process periodically writes its own snapshot, and readers merge them all.
+
+    Snapshot files are named bmi-stats-<generation>-<pid>.json. The generation
+    is drawn when the store is created, which with a preloaded app is once per
+    server run, before the workers fork. Files from another generation (an
+    earlier run) or from a worker that has exited are pruned instead of
+    merged. One server run per directory.
+    """
+
+    def __init__(self, directory, interval=5.0, generation=None):
+        self.directory = directory
+        self.interval = interval
+        self.generation = generation or uuid.uuid4().hex[:12]
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.prune()
+
+    @property
+    def path(self):
+        # Resolved per call: with a preloaded app, workers fork after this object is created.
+        return os.path.join(self.directory, f"bmi-stats-{self.generation}-{os.getpid()}.json")
+
+    def maybe_write(self, aggregator, force=False):
+        """
+        Writes this process's snapshot if `interval` has passed (or `force`).
+        Returns True if it wrote. Errors are logged, never raised: a failed
+        stats write must not fail the request that triggered it.
+        """
+        # Threaded workers share this object; only one thread checks and writes at a time.
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_write < self.interval:
+                return False
+            self._last_write = now
+            path = self.path
+            temp_path = None
+            try:
+                fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=os.path.basename(path) + '.',
+                                                 suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(aggregator.snapshot(), f)
+                os.replace(temp_path, path)
+                return True
+            except OSError as e:
+                logger.warning("Could not write stats snapshot to %s: %s", path, e)
+                if temp_path is not None:
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+                return False
+
+    def _is_current(self, path):
+        """True if the snapshot at `path` belongs to a live worker of this generation."""
+        stem = os.path.basename(path)[len('bmi-stats-'):-len('.json')]
+        generation, _, pid = stem.rpartition('-')
+        if generation != self.generation or not pid.isdigit():
+            return False
+        return int(pid) == os.getpid() or _process_alive(int(pid))
+
+    def prune(self):
+        """Deletes snapshots from earlier runs and from workers that have exited. Returns the paths kept."""
+        kept = []
+        for path in glob.glob(os.path.join(self.directory, 'bmi-stats-*.json')):
+            if self._is_current(path):
+                kept.append(path)
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return kept
+
+    def merged(self, aggregator):
+        """Returns an aggregator combining this process's live data with every other live worker's snapshot."""
+        snapshots = [aggregator.snapshot()]
+        own_path = self.path
+        for path in self.prune():
+            if path == own_path:
+                continue
+            try:
+                with open(path, encoding='utf-8') as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return BMIAggregator.from_snapshots(snapshots)
+
+
+def _process_alive(pid):
+    if os.name == 'nt':
+        # os.kill(pid, 0) would terminate the process on Windows. There is no forking
+        # server there (waitress is one process), so every writer is assumed alive.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True   # exists, owned by another user
+    return True
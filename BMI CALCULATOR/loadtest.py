@@ -0,0 +1,123 @@
+"""
+Load-test harness for the BMI API.
+
+Drives POST /calculate from N concurrent keep-alive clients and reports
+requests/sec and latency percentiles. Uses only the standard library:
+
+    python serve.py --port 8000 &
+    python loadtest.py --url http://127.0.0.1:8000/calculate --concurrency 32 --duration 10
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def make_payloads(count, seed=0):
+    """Pre-encodes `count` distinct request bodies with integer kg / cm values, like real form input."""
+    rng = random.Random(seed)
+    return [
+        json.dumps({"weight": rng.randint(40, 140), "height": rng.randint(145, 205)}).encode('utf-8')
+        for _ in range(count)
+    ]
+
+
+def worker(url, payloads, deadline, latencies, errors, lock):
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=10)
+    headers = {'Content-Type': 'application/json'}
+    local_latencies = []
+    local_errors = 0
+    i = random.randrange(len(payloads))
+
+    while time.perf_counter() < deadline:
+        body = payloads[i % len(payloads)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request('POST', parts.path or '/', body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                local_errors += 1
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            continue
+        local_latencies.append(time.perf_counter() - start)
+
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def run_load_test(url, concurrency=16, duration=10.0, distinct=500):
+    """Runs the load test and returns a summary dict (latencies in milliseconds)."""
+    payloads = make_payloads(distinct)
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    threads = [
+        threading.Thread(target=worker, args=(url, payloads, deadline, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "requests_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] * 1000) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the BMI /calculate endpoint.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000/calculate')
+    parser.add_argument('--concurrency', '-c', type=int, default=16)
+    parser.add_argument('--duration', '-d', type=float, default=10.0, help="Seconds to run.")
+    parser.add_argument('--distinct', type=int, default=500, help="Number of distinct request bodies to cycle through.")
+    parser.add_argument('--json', action='store_true', help="Print the summary as JSON.")
+    args = parser.parse_args()
+
+    summary = run_load_test(args.url, args.concurrency, args.duration, args.distinct)
+    if args.json:
+        print(json.dumps(summary))
+        return
+
+    print("=" * 40)
+    print(f"--- Load Test: {args.url} ---")
+    print(f"Concurrency:  {args.concurrency}")
+    print(f"Requests:     {summary['requests']} ({summary['errors']} errors)")
+    print(f"Throughput:   {summary['requests_per_sec']:.1f} req/s")
+    print(f"Latency p50:  {summary['p50_ms']:.2f} ms")
+    print(f"Latency p90:  {summary['p90_ms']:.2f} ms")
+    print(f"Latency p99:  {summary['p99_ms']:.2f} ms")
+    print(f"Latency max:  {summary['max_ms']:.2f} ms")
+    print("=" * 40)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Production server for the BMI Flask app.
+
+Runs app.py under gunicorn (pre-forked worker processes, POSIX only) or,
+where gunicorn is unavailable (e.g. Windows), under waitress (multi-threaded):
+
+    pip install gunicorn      # or: pip install waitress
+    python serve.py --port 8000 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+
+
+def default_workers():
+    """gunicorn's recommended (2 x cores) + 1 worker processes."""
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def run_gunicorn(host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class StandaloneApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+            return app
+
+    StandaloneApplication({
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'worker_class': 'gthread',
+        'threads': threads,
+        'keepalive': 5,
+        # Import Flask/NumPy once in the master so forked workers share the pages.
+        'preload_app': True,
+        'accesslog': None,
+    }).run()
+
+
+def run_waitress(host, port, threads):
+    from waitress import serve
+    from app import app
+
+    serve(app, host=host, port=port, threads=threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the BMI API with a production WSGI server.")
+    parser.add_argument('--host', default=os.environ.get('BMI_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('BMI_PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('BMI_WORKERS', default_workers())),
+                        help="Worker processes (gunicorn only).")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('BMI_THREADS', '4')),
+                        help="Threads per worker.")
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'waitress'], default='auto')
+    args = parser.parse_args()
+
+    server = args.server
+    if server == 'auto':
+        try:
+            import gunicorn  # noqa: F401
+            server = 'gunicorn'
+        except ImportError:
+            server = 'waitress'
+
+    print(f"--- BMI API on http://{args.host}:{args.port} ({server}) ---")
+    try:
+        if server == 'gunicorn':
+            run_gunicorn(args.host, args.port, args.workers, args.threads)
+        else:
+            run_waitress(args.host, args.port, args.threads)
+    except ImportError as e:
+        print(f"Error: {e}. Install the server with: pip install {server}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,63 @@
+import argparse
+import glob
+import os
+
 import speech_recognition as sr
-import pyttsx3
-import pywhatkit
 import datetime
-import wikipedia
-import pyjokes
 import sys
 import time
 
+from audio_pipeline import AssistantPipeline, MicrophoneSource, Speaker, WavSource
+from command_router import EARLY_TRIGGERS, build_router
+from intent_classifier import IntentClassifier
+from lazy_modules import lazy_import, prewarm
+from recognizers import BACKENDS, GoogleBackend, get_backend, recognize_until
+from offload import OFFLOAD, HandlerTimeout, SummaryLookup
+
 # --- Configuration and Initialization ---pip install Flask pyjokes wikipedia pywhatkit
 
 WAKE_WORD = 'alexa'
+
+# Imported on first use so startup does not wait for them; prewarm() loads them in the background.
+pyttsx3 = lazy_import('pyttsx3')
+pywhatkit = lazy_import('pywhatkit')
+wikipedia = lazy_import('wikipedia')
+pyjokes = lazy_import('pyjokes')
+
 listener = sr.Recognizer()
-engine = pyttsx3.init()
+# Speech-to-text backend (see recognizers.py); replaced from --backend at startup.
+BACKEND = GoogleBackend(listener)
+# Optional wake-word gate (see wake_word.py): phrases it rejects are never sent to BACKEND.
+GATE = None
+
+
+def make_engine():
+    """Creates the TTS engine with the preferred voice."""
+    tts = pyttsx3.init()
+    # Get available voices and set a preferred voice (with fallback)
+    try:
+        voices = tts.getProperty('voices')
+        # Try setting to the second voice (index 1) for a female voice, common on many systems
+        tts.setProperty('voice', voices[1].id)
+    except IndexError:
+        # Fallback to the default system voice
+        print("Warning: Could not set preferred voice. Using system default.")
+    return tts
+
+
+engine = None
+
 
-# Get available voices and set a preferred voice (with fallback)
-try:
-    voices = engine.getProperty('voices')
-    # Try setting to the second voice (index 1) for a female voice, common on many systems
-    engine.setProperty('voice', voices[1].id)
-except IndexError:
-    # Fallback to the default system voice
-    print("Warning: Could not set preferred voice. Using system default.")
-    pass
+def get_engine():
+    """The TTS engine for the sequential loop, created on first use."""
+    global engine
+    if engine is None:
+        engine = make_engine()
+    return engine
+
+
+# Set in pipelined mode: talk() then queues text for the speaker thread instead of blocking.
+SPEAKER = None
 
 
 # --- Helper Functions (Core Logic) ---
@@ -32,9 +68,21 @@ def talk(text):
     Uses runAndWait() to ensure full speech synchronization.
     """
     print(f"Assistant: {text}")
-    engine.say(text)
+    if SPEAKER is not None:
+        SPEAKER.say(text)
+        return
+    tts = get_engine()
+    tts.say(text)
     # Critical for preventing speech truncation/silence in a loop
-    engine.runAndWait()
+    tts.runAndWait()
+
+
+def clean_command(text):
+    """Lowercases recognized text and strips the wake word."""
+    command = text.lower()
+    if WAKE_WORD in command:
+        command = command.replace(WAKE_WORD, '')
+    return command.strip()
 
 
 def take_command():
@@ -49,11 +97,11 @@ def take_command():
 
         try:
             voice = listener.listen(source, timeout=5, phrase_time_limit=10)
-            command = listener.recognize_google(voice)
-            command = command.lower()
-
-            if WAKE_WORD in command:
-                command = command.replace(WAKE_WORD, '').strip()
+            if GATE is not None:
+                voice = GATE.admit(voice)
+                if voice is None:
+                    return ''
+            command = clean_command(recognize_command(voice))
 
             if command:
                 print(f"User said: {command}")
@@ -66,8 +114,8 @@ def take_command():
             # print("Sorry, I did not catch that.") # Suppress this print for smoother loop
             pass
         except sr.RequestError as e:
-            # Issue with Google Speech Recognition service (e.g., no internet)
-            print(f"Could not request results from Google Speech Recognition service; {e}")
+            # Issue with the speech recognition service (e.g., no internet)
+            print(f"Could not request results from the speech recognition service; {e}")
         except Exception as e:
             # Catching other unexpected errors
             print(f"An unexpected error occurred: {e}")
@@ -85,7 +133,8 @@ def play_song(command):
         return
 
     talk(f'playing {song} on YouTube')
-    pywhatkit.playonyt(song)
+    # Opening the browser can take seconds; don't hold the reply for it.
+    OFFLOAD.submit('youtube', pywhatkit.playonyt, song)
 
 
 def get_time(_):
@@ -111,6 +160,14 @@ def relationship_status(_):
     talk('I am in a committed relationship with my dedicated server and Wi-Fi connection.')
 
 
+def fetch_summary(query):
+    """First sentence of the Wikipedia article for `query` (network call; runs on the offload pool)."""
+    return wikipedia.summary(query, sentences=1, auto_suggest=False)
+
+
+SUMMARIES = SummaryLookup(fetch_summary, OFFLOAD)
+
+
 def wikipedia_search(command):
     """Searches Wikipedia based on the command."""
     person = command.replace('who the heck is', '').replace('tell me about', '').strip()
@@ -122,8 +179,10 @@ def wikipedia_search(command):
     talk(f"Searching Wikipedia for {person}")
     try:
         # Fetch the first sentence summary
-        info = wikipedia.summary(person, sentences=1, auto_suggest=False)
+        info = SUMMARIES.get(person)
         talk(info)
+    except HandlerTimeout:
+        talk("Wikipedia is taking too long to answer. Please try again in a moment.")
     except wikipedia.exceptions.PageError:
         talk(f"Sorry, I couldn't find any Wikipedia information about {person}.")
     except Exception:
@@ -145,7 +204,7 @@ def default_response(_):
 
 # --- Command Mapping Dictionary ---
 
-# Organize commands from most specific (phrase) to most general (keyword)
+# Which trigger wins when several occur is set by command_router.COMMAND_PRIORITIES
 COMMAND_MAP = {
     # Full Phrase Commands (Highest Priority)
     'are you single': relationship_status,
@@ -162,6 +221,21 @@ COMMAND_MAP = {
     'exit': handle_exit
 }
 
+ROUTER = build_router(COMMAND_MAP)
+# Fallback for paraphrases and misrecognitions with no exact trigger ("tell me a jok").
+CLASSIFIER = IntentClassifier()
+
+
+def is_early_command(text):
+    """True once a partial transcript already routes to an intent that needs no more words."""
+    match = ROUTER.match(clean_command(text))
+    return match is not None and match.trigger in EARLY_TRIGGERS
+
+
+def recognize_command(audio, source=None):
+    """Transcribes `audio` with BACKEND, stopping early on streaming partials that settle the intent."""
+    return recognize_until(BACKEND, audio, source, is_early_command)
+
 
 def run_alexa():
     """
@@ -172,19 +246,104 @@ def run_alexa():
     if command == '':
         return  # Skip if no command was recognized
 
-    # Iterate through the command map to find the best match
-    for trigger, function in COMMAND_MAP.items():
-        if trigger in command:
-            # Execute the function associated with the trigger
-            function(command)
-            return  # Exit the loop after the first match is executed
+    handle_command(command)
 
-    # If no command matched, execute the default response
-    default_response(command)
+
+def handle_command(command):
+    """Runs the action for an already-cleaned command."""
+    # One pass over the command finds every trigger; the highest-priority one runs
+    match = ROUTER.match(command)
+    if match:
+        match.handler(command)
+        return
+    prediction = CLASSIFIER.classify(command)
+    if prediction:
+        print(f"(Understood as '{prediction.intent}')")
+        COMMAND_MAP[prediction.intent](command)
+    else:
+        default_response(command)
+
+
+def run_pipeline(wav_paths=None, workers=2, calibrate_every=60.0):
+    """
+    Pipelined mode: capture, recognition and speech run on separate threads, so the
+    assistant keeps listening while it recognizes and talks.
+    """
+    global SPEAKER
+    if wav_paths:
+        source = WavSource(wav_paths, listener)
+    else:
+        source = MicrophoneSource(listener, calibrate_every=calibrate_every)
+
+    def recognize(utterance):
+        return recognize_command(utterance.audio, utterance.label if wav_paths else None)
+
+    def dispatch(command):
+        print(f"User said: {command}")
+        handle_command(command)
+
+    SPEAKER = Speaker(make_engine).start()
+    talk(f"Hello, I am ready. Say '{WAKE_WORD}, play a song' or '{WAKE_WORD}, what is the time'.")
+    prewarm(CLASSIFIER.build, pyjokes, wikipedia, pywhatkit)
+    pipeline = AssistantPipeline(source, recognize, dispatch, clean=clean_command, speaker=SPEAKER,
+                                 workers=workers, wake_word=WAKE_WORD, echo_guard=not wav_paths, gate=GATE)
+    try:
+        stats = pipeline.run()
+    finally:
+        SPEAKER = None
+    print(f"Pipeline stats: {stats}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Voice assistant.")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Keep listening while recognizing and speaking (capture/recognition/TTS threads).")
+    parser.add_argument('--wav', nargs='+', metavar='FILE',
+                        help="Replay WAV files instead of the microphone (implies --pipeline).")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='google',
+                        help="Speech recognizer: google (network), vosk or sphinx (offline), "
+                             "transcript (sidecar .txt next to each --wav file).")
+    parser.add_argument('--model', help="Model directory for the vosk backend (default: $VOSK_MODEL or download en-us).")
+    parser.add_argument('--workers', type=int, default=2, help="Recognition worker threads.")
+    parser.add_argument('--calibrate-every', type=float, default=60.0,
+                        help="Seconds between ambient-noise recalibrations in pipelined mode.")
+    parser.add_argument('--wake-gate', choices=['template', 'vosk'],
+                        help="Only recognize phrases that start with the wake word, spotted cheaply first.")
+    parser.add_argument('--wake-templates', metavar='DIR', default='wake_templates',
+                        help="WAV recordings of the wake word for --wake-gate template.")
+    parser.add_argument('--wake-threshold', type=float,
+                        help="Template match threshold (lower is stricter); calibrate with bench_wake_word.py.")
+    return parser.parse_args()
+
+
+def make_gate(args):
+    # Only loaded when the gate is enabled (the template spotter pulls in numpy).
+    from wake_word import EnergyVAD, TemplateSpotter, VoskSpotter, WakeWordGate
+
+    if args.wake_gate == 'vosk':
+        spotter = VoskSpotter(WAKE_WORD, model_path=args.model)
+    else:
+        options = {} if args.wake_threshold is None else {'threshold': args.wake_threshold}
+        spotter = TemplateSpotter.from_wavs(sorted(glob.glob(os.path.join(args.wake_templates, '*.wav'))), **options)
+    return WakeWordGate(EnergyVAD(), spotter)
 
 
 # --- Main Execution Loop ---
 if __name__ == '__main__':
-    talk(f"Hello, I am ready. Say '{WAKE_WORD}, play a song' or '{WAKE_WORD}, what is the time'.")
-    while True:
-        run_alexa()
\ No newline at end of file
+    args = parse_args()
+    if args.backend == 'vosk':
+        BACKEND = get_backend('vosk', model_path=args.model)
+    elif args.backend != 'google':
+        BACKEND = get_backend(args.backend)
+    # Load the model once, before the first command, and keep it for the whole session.
+    BACKEND.load()
+    if args.wake_gate:
+        GATE = make_gate(args)
+    if args.pipeline or args.wav:
+        run_pipeline(args.wav, args.workers, args.calibrate_every)
+    else:
+        talk(f"Hello, I am ready. Say '{WAKE_WORD}, play a song' or '{WAKE_WORD}, what is the time'.")
+        # Import handler dependencies while the user is saying the first command.
+        prewarm(CLASSIFIER.build, pyjokes, wikipedia, pywhatkit)
+        while True:
+            run_alexa()
\ No newline at end of file
@@ -1,27 +1,59 @@
-import pywhatkit
+import contextvars
 import datetime
-import wikipedia
-import pyjokes
-from flask import Flask, request, jsonify
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS  # <--- NEW: Import CORS
 
+from command_router import build_router
+from command_stream import StreamHub
+from intent_classifier import IntentClassifier
+from intent_cache import BY_ARGUMENTS, PER_DAY, PER_MINUTE, STATIC, IntentCache, cache_policy, dont_cache
+from lazy_modules import lazy_import, prewarm
+from metrics import CONTENT_TYPE, FAST_BUCKETS, PROFILER, REGISTRY
+from offload import OFFLOAD, HandlerTimeout, SummaryLookup
+
 # --- 1. Configuration and Initialization ---
 # NOTE: TTS (pyttsx3) and Microphone (sr) dependencies are REMOVED.
 
+# Handler dependencies are imported on first use (pywhatkit alone takes seconds).
+pywhatkit = lazy_import('pywhatkit')
+wikipedia = lazy_import('wikipedia')
+pyjokes = lazy_import('pyjokes')
+PREWARM = os.environ.get('ASSISTANT_PREWARM', '1') != '0'
+MAX_BATCH = int(os.environ.get('ASSISTANT_MAX_BATCH', '32'))
+BATCH_WORKERS = int(os.environ.get('ASSISTANT_BATCH_WORKERS', '8'))
+
 app = Flask(__name__)
 CORS(app)  # <--- NEW: Enable CORS for all routes
 
 WAKE_WORD = 'alexa'
-ASSISTANT_RESPONSE_TEXT = ""
+
+# Replies spoken while handling the current request. Each request (thread or
+# task) gets its own list, so concurrent requests never see each other's text.
+_responses = contextvars.ContextVar('assistant_responses', default=None)
+# Set for streamed commands: called with progress messages from slow handlers.
+_progress = contextvars.ContextVar('assistant_progress', default=None)
 
 
 # --- 2. Helper Function ---
 
 def talk(text):
-    """Stores the text to be returned via the API response."""
-    global ASSISTANT_RESPONSE_TEXT
+    """Records the text to be returned in the current request's API response."""
     print(f"[Backend Log] Assistant: {text}")
-    ASSISTANT_RESPONSE_TEXT = text
+    responses = _responses.get()
+    if responses is not None:
+        responses.append(text)
+
+
+def report_progress(text):
+    """Sends an interim message to a streaming client; a no-op for plain requests."""
+    callback = _progress.get()
+    if callback is not None:
+        callback(text)
 
 
 # --- 3. Command Execution Functions ---
@@ -34,15 +66,18 @@ def play_song(command):
         return
 
     talk(f'Playing {song} on YouTube. (Check the server machine for the browser window.)')
-    pywhatkit.playonyt(song)
+    # Opening the browser can take seconds; don't hold the reply for it.
+    OFFLOAD.submit('youtube', pywhatkit.playonyt, song)
 
 
+@cache_policy(PER_MINUTE)
 def get_time(_):
     """Tells the current time."""
     current_time = datetime.datetime.now().strftime('%I:%M %p')
     talk(f'Current time is {current_time}')
 
 
+@cache_policy(PER_DAY)
 def get_date(_):
     """Tells the current date."""
     today = datetime.datetime.now().strftime('%A, %B %d, %Y')
@@ -55,11 +90,22 @@ def tell_joke(_):
     talk(joke)
 
 
+@cache_policy(STATIC)
 def relationship_status(_):
     """Provides a humorous answer about its relationship status."""
     talk('I am in a committed relationship with my dedicated server and Wi-Fi connection.')
 
 
+def fetch_summary(query):
+    """First sentence of the Wikipedia article for `query` (network call; runs on the offload pool)."""
+    with PROFILER.attach():
+        return wikipedia.summary(query, sentences=1, auto_suggest=False)
+
+
+SUMMARIES = SummaryLookup(fetch_summary, OFFLOAD)
+
+
+@cache_policy(BY_ARGUMENTS)
 def wikipedia_search(command):
     """Searches Wikipedia based on the command."""
     person = command.replace('who the heck is', '').replace('tell me about', '').strip()
@@ -68,20 +114,27 @@ def wikipedia_search(command):
         talk("Please tell me who you want to search for.")
         return
 
+    report_progress(f"Searching Wikipedia for {person}...")
     try:
-        info = wikipedia.summary(person, sentences=1, auto_suggest=False)
+        info = SUMMARIES.get(person)
         talk(info)
+    except HandlerTimeout:
+        dont_cache()
+        talk("Wikipedia is taking too long to answer. Please try again in a moment.")
     except wikipedia.exceptions.PageError:
         talk(f"Sorry, I couldn't find any Wikipedia information about {person}.")
     except Exception:
+        dont_cache()
         talk("Sorry, I ran into an error fetching that information.")
 
 
+@cache_policy(STATIC)
 def handle_exit(_):
     """Confirms the exit command but keeps the server running."""
     talk('The server received a shutdown command, but it will remain running. Goodbye!')
 
 
+@cache_policy(STATIC)
 def default_response(_):
     """Handles commands that weren't matched."""
     talk("I didn't recognize that command. Try asking about the time, a person, or to play a song.")
@@ -103,62 +156,214 @@ COMMAND_MAP = {
     'exit': handle_exit
 }
 
+# Trigger priorities (e.g. 'joke' over 'play') come from command_router.COMMAND_PRIORITIES
+ROUTER = build_router(COMMAND_MAP)
+# Paraphrases and misrecognitions with no exact trigger ("tell me a jok") go to the nearest example's intent.
+CLASSIFIER = IntentClassifier()
+
+# Replies of deterministic intents (see the @cache_policy declarations above).
+INTENT_CACHE = IntentCache()
+
+# --- Metrics (served on /metrics) ---
+HTTP_SECONDS = REGISTRY.histogram('assistant_http_request_seconds',
+                                  'Time in Flask views, by endpoint and status.', ('endpoint', 'status'))
+MATCH_SECONDS = REGISTRY.histogram('assistant_match_seconds', 'Time to route a command to an intent.',
+                                   buckets=FAST_BUCKETS)
+CLASSIFY_SECONDS = REGISTRY.histogram('assistant_classify_seconds',
+                                      'Time to classify commands that matched no trigger.', buckets=FAST_BUCKETS)
+FUZZY_MATCHES = REGISTRY.counter('assistant_fuzzy_matches_total',
+                                 'Commands without a trigger, by the intent the classifier chose (none if no match).',
+                                 ('intent',))
+INTENT_SECONDS = REGISTRY.histogram('assistant_intent_seconds',
+                                    'Time to answer a command (cache lookup plus handler), by intent.', ('intent',))
+COMMANDS = REGISTRY.counter('assistant_commands_total', 'Commands answered, by intent and cache result.',
+                            ('intent', 'cache'))
+ERRORS = REGISTRY.counter('assistant_errors_total', 'Unhandled exceptions, by where they were caught.', ('where',))
+
 
 def run_command_logic(command):
     """Executes the command logic based on the text input and returns the response."""
-    global ASSISTANT_RESPONSE_TEXT
-    ASSISTANT_RESPONSE_TEXT = ""
+    return execute_command(command)[0]
+
 
+def route_command(command):
+    """Returns (normalized command, handler) without running it; the handler is None for an empty command."""
     command = command.lower().strip()
+    if WAKE_WORD in command:
+        command = command.replace(WAKE_WORD, '').strip()
 
     if not command:
-        talk("Please provide a command.")
-        return ASSISTANT_RESPONSE_TEXT
+        return command, None
+
+    started = time.perf_counter()
+    match = ROUTER.match(command)
+    MATCH_SECONDS.observe(time.perf_counter() - started)
+    if match:
+        print(f"[Backend Log] Trigger matched: '{match.trigger}' for command: '{command}'")
+    return command, match.handler if match else fallback_handler(command)
+
+
+def execute_command(command, routed=None):
+    """
+    Returns (response text, expires_at). expires_at is the unix time until which
+    the response may be reused, or None if it must not be cached.
+    `routed` is a (command, handler) pair already returned by route_command.
+    """
+    command, handler = routed or route_command(command)
+    if handler is None:
+        return "Please provide a command.", None
+    intent = handler.__name__
+
+    ran = []
+
+    def produce():
+        ran.append(True)
+        return _run_handler(handler, command)
+
+    with INTENT_SECONDS.time(intent=intent), PROFILER.track(intent):
+        try:
+            result = INTENT_CACHE.respond(handler, command, produce)
+        except Exception:
+            ERRORS.inc(where=intent)
+            raise
+    if getattr(handler, 'cache_policy', None) is None:
+        COMMANDS.inc(intent=intent, cache='bypass')
+    else:
+        COMMANDS.inc(intent=intent, cache='miss' if ran else 'hit')
+    return result
+
+
+def fallback_handler(command):
+    """Handler for a command that matched no trigger: the classifier's intent, else default_response."""
+    started = time.perf_counter()
+    prediction = CLASSIFIER.classify(command)
+    CLASSIFY_SECONDS.observe(time.perf_counter() - started)
+    FUZZY_MATCHES.inc(intent=prediction.intent if prediction else 'none')
+    if prediction is None:
+        return default_response
+    print(f"[Backend Log] Fuzzy match: '{prediction.intent}' (like '{prediction.example}', "
+          f"score {prediction.score:.2f}) for command: '{command}'")
+    return COMMAND_MAP[prediction.intent]
+
+
+def _run_handler(handler, command):
+    """Runs one handler and returns everything it said."""
+    responses = []
+    token = _responses.set(responses)
+    try:
+        handler(command)
+    finally:
+        _responses.reset(token)
+    return ' '.join(responses)
 
-    if WAKE_WORD in command:
-        command = command.replace(WAKE_WORD, '').strip()
 
-    found_command = False
-    for trigger, function in COMMAND_MAP.items():
-        if trigger in command:
-            if trigger == 'play' and 'joke' in command:
-                continue
+# Batch items and streamed commands run here. Kept apart from OFFLOAD, whose
+# workers the Wikipedia handler itself waits on.
+COMMAND_POOL = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='assistant-command')
+STREAMS = StreamHub()
+_stream_ids = itertools.count(1)
+
+
+def _commands_from(data):
+    """The command list of a batch body: {"commands": [...]} or {"command": "..."}. None if malformed."""
+    if not isinstance(data, dict):
+        return None
+    commands = data.get('commands', [data['command']] if 'command' in data else None)
+    if not isinstance(commands, list) or not commands or not all(isinstance(c, str) for c in commands):
+        return None
+    return commands
+
 
-            print(f"[Backend Log] Trigger matched: '{trigger}' for command: '{command}'")
-            function(command)
-            found_command = True
-            break
+def _batch_item(command):
+    if not command.strip():
+        return {"status": "error", "command_received": command, "assistant_response": "Please provide a command."}
+    try:
+        response_text, _ = execute_command(command)
+        return {"status": "success", "command_received": command, "assistant_response": response_text}
+    except Exception as e:
+        print(f"[ERROR] Batch command failed: {e}")
+        ERRORS.inc(where='batch')
+        return {"status": "error", "command_received": command,
+                "assistant_response": "Sorry, I ran into a technical problem while processing your request."}
 
-    if not found_command:
-        default_response(command)
 
-    return ASSISTANT_RESPONSE_TEXT
+def _stream_command(client_id, request_id, command):
+    """Runs one command for a streaming client, publishing progress and then the reply."""
+    token = _progress.set(lambda text: STREAMS.publish(client_id, 'partial', {"id": request_id, "text": text}))
+    try:
+        reply = _batch_item(command)
+    finally:
+        _progress.reset(token)
+    STREAMS.publish(client_id, 'reply', dict(reply, id=request_id))
 
 
 # --- 5. Flask API Endpoint ---
 
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    started = getattr(g, 'started', None)
+    if started is not None:
+        HTTP_SECONDS.observe(time.perf_counter() - started,
+                             endpoint=request.endpoint or 'unknown', status=response.status_code)
+    return response
+
+
 @app.route('/command', methods=['GET', 'POST'])
 def handle_command():
-    """Receives command text and returns a JSON response."""
+    """
+    Receives command text and returns a JSON response.
+
+    POST is the default. GET /command?command=... is accepted only for intents with a
+    cache policy, which have no side effects; its responses carry ETag and Cache-Control
+    so browsers can reuse the reply (the time until the minute changes, the date until
+    midnight, ...). Other intents, such as 'play', answer GET with 405. POST replies say
+    whether they were cacheable, so a client knows which commands it may send as GET.
+    """
     try:
-        if not request.is_json:
-            return jsonify({"error": "Missing JSON in request"}), 400
-
-        data = request.get_json()
-        command_text = data.get('command', '')
+        if request.method == 'GET' and 'command' in request.args:
+            command_text = request.args.get('command', '')
+        else:
+            if not request.is_json:
+                return jsonify({"error": "Missing JSON in request"}), 400
+            data = request.get_json()
+            command_text = data.get('command', '')
 
         if not command_text:
             return jsonify({"error": "Missing 'command' field in JSON"}), 400
 
-        response_text = run_command_logic(command_text)
+        routed = route_command(command_text)
+        handler = routed[1]
+        if request.method == 'GET' and handler is not None and getattr(handler, 'cache_policy', None) is None:
+            # A GET can be prefetched or replayed by the browser; side effects (opening a video) need POST.
+            response = jsonify({"error": "This command has side effects; send it with POST."})
+            response.headers['Allow'] = 'POST'
+            return response, 405
 
-        return jsonify({
+        response_text, expires_at = execute_command(command_text, routed)
+
+        response = jsonify({
             "status": "success",
             "command_received": command_text,
-            "assistant_response": response_text
+            "assistant_response": response_text,
+            "cacheable": expires_at is not None,
         })
+        if request.method == 'GET':
+            max_age = int(expires_at - time.time()) if expires_at is not None else 0
+            if max_age > 0:
+                response.cache_control.public = True
+                response.cache_control.max_age = max_age
+                response.add_etag()
+                return response.make_conditional(request)
+            response.cache_control.no_store = True
+        return response
     except Exception as e:
         print(f"[ERROR] API Handler failed: {e}")
+        ERRORS.inc(where='api')
         return jsonify({
             "status": "error",
             "message": f"An internal server error occurred: {str(e)}",
@@ -166,10 +371,101 @@ def handle_command():
         }), 500
 
 
+@app.route('/command/batch', methods=['POST'])
+def handle_batch():
+    """
+    Runs {"commands": [...]} concurrently; the results come back in the same order.
+    A failing command is reported in its own result and does not fail the batch.
+    """
+    commands = _commands_from(request.get_json(silent=True))
+    if commands is None:
+        return jsonify({"error": "Expected JSON with a non-empty 'commands' list of strings"}), 400
+    if len(commands) > MAX_BATCH:
+        return jsonify({"error": f"At most {MAX_BATCH} commands per batch"}), 413
+    results = list(COMMAND_POOL.map(_batch_item, commands))
+    return jsonify({"status": "success", "results": results})
+
+
+@app.route('/command/stream', methods=['GET'])
+def open_stream():
+    """
+    Opens a server-sent event stream. Pass ?client=<id> to choose the id commands are
+    posted to; otherwise one is generated and sent in the first ('ready') event.
+    """
+    client_id = request.args.get('client') or None
+    if client_id is not None and client_id in STREAMS:
+        return jsonify({"error": f"Client '{client_id}' already has an open stream"}), 409
+    # The stream registers the client when it starts; a request that lost a race
+    # for the same id past the check above gets an 'error' event instead.
+    return Response(STREAMS.events(client_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/command/stream/<client_id>', methods=['POST'])
+def post_to_stream(client_id):
+    """
+    Queues {"command": "..."} or {"commands": [...]} for a client's open stream and returns
+    at once with the ids its 'partial' and 'reply' events will carry.
+    """
+    if client_id not in STREAMS:
+        return jsonify({"error": f"No open stream for client '{client_id}'"}), 404
+    commands = _commands_from(request.get_json(silent=True))
+    if commands is None:
+        return jsonify({"error": "Expected JSON with 'command' or a non-empty 'commands' list of strings"}), 400
+    if len(commands) > MAX_BATCH:
+        return jsonify({"error": f"At most {MAX_BATCH} commands per request"}), 413
+    accepted = []
+    for command in commands:
+        request_id = str(next(_stream_ids))
+        COMMAND_POOL.submit(_stream_command, client_id, request_id, command)
+        accepted.append(request_id)
+    return jsonify({"status": "accepted", "ids": accepted}), 202
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters of the intent response cache and the Wikipedia summary cache."""
+    return jsonify({"intents": INTENT_CACHE.stats(), "wikipedia": SUMMARIES.cache.stats()})
+
+
+def _component_metrics():
+    """Counters kept by the caches, the offload pool and the stream hub, read at scrape time."""
+    families = []
+    for cache_name, stats in (('intents', INTENT_CACHE.stats()), ('wikipedia', SUMMARIES.cache.stats())):
+        families += [
+            ('assistant_cache_hits_total', 'counter', 'Cache hits.', [({'cache': cache_name}, stats['hits'])]),
+            ('assistant_cache_misses_total', 'counter', 'Cache misses.', [({'cache': cache_name}, stats['misses'])]),
+            ('assistant_cache_hit_ratio', 'gauge', 'Hits over lookups since start.',
+             [({'cache': cache_name}, stats['hit_rate'])]),
+        ]
+    offload = OFFLOAD.stats()
+    families.append(('assistant_offload_total', 'counter', 'Offloaded slow work, by outcome.',
+                     [({'outcome': outcome}, count) for outcome, count in offload.items()]))
+    families.append(('assistant_stream_clients', 'gauge', 'Open /command/stream connections.', [({}, len(STREAMS))]))
+    families.append(('assistant_slow_profiles_total', 'counter', 'Slow requests whose stacks were dumped.',
+                     [({}, PROFILER.dumped)]))
+    return families
+
+
+REGISTRY.add_collector(_component_metrics)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Latency histograms, cache hit rates and error counts in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
 # --- 6. Main Execution ---
 if __name__ == '__main__':
     print("\n--- VOICE ASSISTANT FLASK BACKEND STARTING ---")
-    print(f"API is available at: http://127.0.0.1:5000/command (POST)")
+    print(f"API is available at: http://127.0.0.1:5000/command (GET ?command=... or POST)")
+    print("Batches: POST /command/batch   Streaming: GET /command/stream + POST /command/stream/<client>")
     print("Ensure the frontend is open and pointing to this address.")
+    print("Metrics: GET /metrics" + (f" (profiling requests slower than {PROFILER.threshold_ms:g} ms)" if PROFILER.enabled else ""))
     # Use host='0.0.0.0' for wider local access if needed, but '127.0.0.1' is fine for development.
-    app.run(debug=True, port=5000, host='127.0.0.1')
\ No newline at end of file
+    if PREWARM:
+        # Give the server a moment to start listening, then import handler dependencies in the background.
+        prewarm(CLASSIFIER.build, pyjokes, wikipedia, pywhatkit, delay=1.0)
+    # Responses are per request, so the threaded dev server can serve clients concurrently.
+    app.run(debug=True, port=5000, host='127.0.0.1', threaded=True)
\ No newline at end of file
@@ -0,0 +1,366 @@
+"""
+Pipelined audio loop for the desktop assistant.
+
+The sequential loop in VoiceCommand.py opens the microphone, calibrates,
+listens, recognizes, dispatches and speaks one step at a time, so the
+assistant is deaf while it waits on recognition or talks. Here each stage
+runs on its own thread(s):
+
+    capture thread  --audio queue-->  recognition workers  --ordered-->  dispatcher  --text-->  speaker thread
+
+  * The capture thread keeps one microphone open and recalibrates for
+    ambient noise only every `calibrate_every` seconds (never while the
+    speaker is talking).
+  * Recognition runs on a small worker pool; results are dispatched in
+    capture order.
+  * TTS runs on a dedicated speaker thread that owns the pyttsx3 engine.
+    Utterances captured while the assistant was speaking are treated as its
+    own echo and dropped unless they contain the wake word.
+
+WavSource replays prerecorded WAV files instead of the microphone; with the
+'transcript' recognizer backend (recognizers.py) the whole pipeline can be
+exercised offline.
+"""
+import heapq
+import queue
+import threading
+import time
+from collections import deque
+
+import speech_recognition as sr
+
+CALIBRATE_EVERY = 60.0
+CALIBRATION_DURATION = 0.5
+ECHO_TAIL = 0.3   # seconds after speech ends that the mic may still hear it
+DRAIN_TIMEOUT = 30.0   # longest stop() waits for queued speech to finish
+
+
+class Utterance:
+    __slots__ = ('audio', 'label', 'started', 'ended', 'seq', 'woke')
+
+    def __init__(self, audio, label, started, ended):
+        self.audio = audio
+        self.label = label
+        self.started = started
+        self.ended = ended
+        self.seq = None
+        self.woke = False
+
+
+# --- Audio Sources ---
+
+class MicrophoneSource:
+    """Keeps one microphone open; calibrates once up front and then periodically."""
+
+    def __init__(self, recognizer, calibrate_every=CALIBRATE_EVERY, calibration_duration=CALIBRATION_DURATION,
+                 listen_timeout=1.0, phrase_time_limit=10, clock=time.monotonic):
+        self.recognizer = recognizer
+        self.calibrate_every = calibrate_every
+        self.calibration_duration = calibration_duration
+        self.listen_timeout = listen_timeout
+        self.phrase_time_limit = phrase_time_limit
+        self._clock = clock
+        self.calibrations = 0
+
+    def utterances(self, stop, can_calibrate=lambda: True):
+        with sr.Microphone() as source:
+            next_calibration = 0.0
+            while not stop.is_set():
+                now = self._clock()
+                if now >= next_calibration and can_calibrate():
+                    self.recognizer.adjust_for_ambient_noise(source, duration=self.calibration_duration)
+                    self.calibrations += 1
+                    next_calibration = now + self.calibrate_every
+                started = self._clock()
+                try:
+                    # A short timeout keeps the loop responsive to stop().
+                    audio = self.recognizer.listen(source, timeout=self.listen_timeout,
+                                                   phrase_time_limit=self.phrase_time_limit)
+                except sr.WaitTimeoutError:
+                    continue
+                yield Utterance(audio, 'microphone', started, self._clock())
+
+
+class WavSource:
+    """Replays WAV files, one utterance per file, optionally `interval` seconds apart."""
+
+    def __init__(self, paths, recognizer, interval=0.0, clock=time.monotonic):
+        self.paths = list(paths)
+        self.recognizer = recognizer
+        self.interval = interval
+        self._clock = clock
+
+    def utterances(self, stop, can_calibrate=lambda: True):
+        for path in self.paths:
+            if stop.is_set():
+                return
+            started = self._clock()
+            with sr.AudioFile(path) as source:
+                audio = self.recognizer.record(source)
+            yield Utterance(audio, path, started, self._clock())
+            if self.interval:
+                stop.wait(self.interval)
+
+
+# --- Speaker ---
+
+class Speaker:
+    """
+    Speaks queued text on its own thread. The engine is created by
+    `engine_factory` inside that thread, since TTS drivers are not reliably
+    usable across threads.
+    """
+
+    def __init__(self, engine_factory, clock=time.monotonic, history=32):
+        self._engine_factory = engine_factory
+        self._clock = clock
+        self._queue = queue.Queue()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._lock = threading.Lock()
+        self._speaking_since = None
+        self._intervals = deque(maxlen=history)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='assistant-speaker', daemon=True)
+        self._thread.start()
+        return self
+
+    def say(self, text):
+        self._idle.clear()
+        self._queue.put(text)
+
+    @property
+    def speaking(self):
+        return not self._idle.is_set()
+
+    def overlaps(self, start, end):
+        """True if the assistant was talking at any point in [start, end]."""
+        with self._lock:
+            if self._speaking_since is not None and self._speaking_since <= end:
+                return True
+            return any(s <= end and start <= e + ECHO_TAIL for s, e in self._intervals)
+
+    def wait_idle(self, timeout=None):
+        return self._idle.wait(timeout)
+
+    def stop(self, drain=True, timeout=DRAIN_TIMEOUT):
+        if drain and not self.wait_idle(timeout):
+            print("Speaker did not finish in time; stopping anyway.")
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            engine = self._engine_factory()
+        except Exception as e:
+            # Keep consuming the queue so say()/stop() never wait on a speaker that cannot start.
+            print(f"Speaker unavailable, replies will not be spoken: {e}")
+            engine = None
+        try:
+            while True:
+                text = self._queue.get()
+                if text is None:
+                    break
+                if engine is None:
+                    if self._queue.empty():
+                        self._idle.set()
+                    continue
+                with self._lock:
+                    self._speaking_since = self._clock()
+                try:
+                    engine.say(text)
+                    engine.runAndWait()
+                except Exception as e:
+                    print(f"Speaker error: {e}")
+                finally:
+                    with self._lock:
+                        self._intervals.append((self._speaking_since, self._clock()))
+                        self._speaking_since = None
+                    if self._queue.empty():
+                        self._idle.set()
+        finally:
+            self._idle.set()
+
+
+# --- Pipeline ---
+
+class AssistantPipeline:
+    """
+    Wires a source, a recognizer and a dispatch function together.
+
+    recognize(utterance) -> text, may raise sr.UnknownValueError / sr.RequestError
+    clean(text) -> command ('' to ignore), e.g. lowercasing and stripping the wake word
+    dispatch(command) runs the intent; raising SystemExit stops the pipeline.
+    echo_guard drops speech captured while the speaker was talking (microphone input only).
+    gate (wake_word.WakeWordGate) screens phrases before recognition; rejected ones are never transcribed.
+    """
+
+    def __init__(self, source, recognize, dispatch, clean=str.strip, speaker=None, workers=2,
+                 wake_word=None, echo_guard=True, gate=None, max_pending=8, clock=time.monotonic):
+        self.source = source
+        self.recognize = recognize
+        self.dispatch = dispatch
+        self.clean = clean
+        self.speaker = speaker
+        self.workers = workers
+        self.wake_word = wake_word
+        self.echo_guard = echo_guard
+        self.gate = gate
+        self._clock = clock
+        self._audio = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._results = []
+        self._results_ready = threading.Condition()
+        self._captured = 0
+        self._capture_finished = False
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self.counters = {'captured': 0, 'dropped_backlog': 0, 'gated': 0, 'unrecognized': 0,
+                         'recognition_errors': 0, 'echo': 0, 'dispatched': 0}
+        self._latency_total = 0.0
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.counters[name] += 1
+
+    # --- Stages ---
+
+    def _capture(self):
+        can_calibrate = (lambda: not self.speaker.speaking) if self.speaker else (lambda: True)
+        try:
+            for utterance in self.source.utterances(self._stop, can_calibrate):
+                with self._results_ready:
+                    utterance.seq = self._captured
+                try:
+                    self._audio.put_nowait(utterance)
+                except queue.Full:
+                    # Recognition is falling behind; dropping is better than going deaf.
+                    self._count('dropped_backlog')
+                    continue
+                with self._results_ready:
+                    self._captured += 1
+                self._count('captured')
+        except Exception as e:
+            print(f"Audio capture stopped: {e}")
+        finally:
+            with self._results_ready:
+                self._capture_finished = True
+                self._results_ready.notify_all()
+
+    def _recognize(self):
+        while True:
+            utterance = self._audio.get()
+            if utterance is None:
+                return
+            try:
+                text = self._transcribe(utterance)
+            except Exception as e:
+                print(f"An unexpected recognition error occurred: {e}")
+                self._count('recognition_errors')
+                text = ''
+            # Every sequence number gets a result, even an empty one: the dispatcher waits for them in order.
+            self._push_result(utterance, text)
+
+    def _transcribe(self, utterance):
+        """The recognized text of one utterance, or '' if it was gated or not understood."""
+        if self.gate is not None:
+            decision, audio = self.gate.check(utterance.audio)
+            if audio is None:
+                self._count('gated')
+                return ''
+            utterance.audio = audio
+            utterance.woke = decision == 'wake'
+        try:
+            return self.recognize(utterance)
+        except sr.UnknownValueError:
+            self._count('unrecognized')
+        except sr.RequestError as e:
+            print(f"Could not request results from the speech recognition service; {e}")
+            self._count('recognition_errors')
+        return ''
+
+    def _push_result(self, utterance, text):
+        with self._results_ready:
+            heapq.heappush(self._results, (utterance.seq, text or '', utterance))
+            self._results_ready.notify_all()
+
+    def _dispatcher(self):
+        next_seq = 0
+        while True:
+            with self._results_ready:
+                while self._stop.is_set() or not (self._results and self._results[0][0] == next_seq):
+                    if self._stop.is_set() or (self._capture_finished and next_seq >= self._captured):
+                        self._done.set()
+                        return
+                    self._results_ready.wait(0.5)
+                _, text, utterance = heapq.heappop(self._results)
+            next_seq += 1
+            self._handle(text, utterance)
+
+    def _handle(self, text, utterance):
+        if not text:
+            return
+        lowered = text.lower()
+        said_wake_word = utterance.woke or (self.wake_word and self.wake_word in lowered)
+        if (self.echo_guard and self.speaker is not None and not said_wake_word
+                and self.speaker.overlaps(utterance.started, utterance.ended)):
+            self._count('echo')
+            return
+        command = self.clean(text)
+        if not command:
+            return
+        with self._stats_lock:
+            self.counters['dispatched'] += 1
+            self._latency_total += self._clock() - utterance.ended
+        try:
+            self.dispatch(command)
+        except SystemExit:
+            self.stop()
+        except Exception as e:
+            print(f"Command failed: {e}")
+
+    # --- Lifecycle ---
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._capture, name='assistant-capture', daemon=True),
+                         threading.Thread(target=self._dispatcher, name='assistant-dispatch', daemon=True)]
+        self._threads += [threading.Thread(target=self._recognize, name=f'assistant-recognize-{i}', daemon=True)
+                          for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._results_ready:
+            self._results_ready.notify_all()
+
+    def run(self):
+        """Starts the pipeline and blocks until the source is exhausted or stop() is called."""
+        self.start()
+        try:
+            while not self._done.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+            self._done.wait(1.0)
+        finally:
+            self._stop.set()
+            for _ in range(self.workers):
+                self._audio.put(None)
+            if self.speaker is not None:
+                self.speaker.stop(drain=True)
+        return self.stats()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self.counters)
+            dispatched = stats['dispatched']
+            stats['mean_latency_ms'] = round(self._latency_total / dispatched * 1000, 1) if dispatched else None
+        if self.gate is not None:
+            stats['gate'] = self.gate.stats()
+        return stats
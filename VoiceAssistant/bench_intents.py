@@ -0,0 +1,140 @@
+"""
+Accuracy and latency of intent matching on a labelled corpus.
+
+    python bench_intents.py                        # fixtures/intents.tsv
+    python bench_intents.py my_commands.tsv --repeat 200
+
+Each corpus line is "intent<TAB>command"; 'none' marks commands that should
+reach default_response. Compares the trigger router alone with the router
+plus the fuzzy classifier fallback, and times the classifier with numpy
+(if installed) and without it.
+
+Besides overall accuracy it reports recall on commands that have an intent
+and false accepts on 'none' commands, with the accepts the classifier caused
+counted separately from those of the triggers. The bundled corpus is small
+and hand-written; run it on real commands before trusting the numbers.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from command_router import build_router
+from intent_classifier import IntentClassifier, _numpy_available
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'intents.tsv')
+
+# COMMAND_MAP's triggers, with each handler replaced by the intent name the corpus uses.
+TRIGGER_INTENTS = {
+    'are you single': 'are you single',
+    'who the heck is': 'tell me about',
+    'tell me about': 'tell me about',
+    'goodbye': 'goodbye',
+    'stop listening': 'goodbye',
+    'joke': 'joke',
+    'play': 'play',
+    'time': 'time',
+    'date': 'date',
+    'stop': 'goodbye',
+    'exit': 'goodbye',
+}
+
+
+def load_corpus(path):
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            intent, command = line.split('\t', 1)
+            rows.append((intent, command))
+    return rows
+
+
+def route(router, command, classifier=None):
+    """(intent, how) where how is 'trigger', 'classifier' or None."""
+    match = router.match(command)
+    if match:
+        return match.handler, 'trigger'
+    if classifier is not None:
+        prediction = classifier.classify(command)
+        if prediction is not None:
+            return TRIGGER_INTENTS[prediction.intent], 'classifier'
+    return 'none', None
+
+
+def evaluate(rows, predict):
+    results = {'correct': 0, 'in_scope': 0, 'recalled': 0, 'out_of_scope': 0, 'false_accepts': 0,
+               'classifier_false_accepts': 0, 'errors': []}
+    for intent, command in rows:
+        predicted, how = predict(command)
+        if predicted == intent:
+            results['correct'] += 1
+        else:
+            results['errors'].append((intent, predicted, how, command))
+        if intent == 'none':
+            results['out_of_scope'] += 1
+            if predicted != 'none':
+                results['false_accepts'] += 1
+                results['classifier_false_accepts'] += how == 'classifier'
+        else:
+            results['in_scope'] += 1
+            results['recalled'] += predicted == intent
+    return results
+
+
+def latency(classifier, commands, repeat):
+    """Per-lookup times in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        for command in commands:
+            start = time.perf_counter()
+            classifier.classify(command)
+            samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent matching accuracy and latency.")
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS, help="TSV of intent<TAB>command lines.")
+    parser.add_argument('--repeat', type=int, default=100, help="Passes over the corpus when timing.")
+    parser.add_argument('--errors', action='store_true', help="List misclassified commands.")
+    args = parser.parse_args()
+
+    rows = load_corpus(args.corpus)
+    router = build_router(TRIGGER_INTENTS)
+    classifier = IntentClassifier()
+    print(f"Corpus: {len(rows)} commands, {len(classifier)} example utterances\n")
+
+    print(f"{'matcher':<22}{'accuracy':>10}{'recall':>9}{'false acc.':>12}{'by classifier':>15}")
+    for name, predict in (('triggers only', lambda c: route(router, c)),
+                          ('triggers + classifier', lambda c: route(router, c, classifier))):
+        r = evaluate(rows, predict)
+        false_accepts = f"{r['false_accepts']}/{r['out_of_scope']}"
+        print(f"{name:<22}{r['correct'] / len(rows):>10.1%}{r['recalled'] / max(r['in_scope'], 1):>9.1%}"
+              f"{false_accepts:>12}{r['classifier_false_accepts']:>15}")
+        if args.errors:
+            for intent, predicted, how, command in r['errors']:
+                print(f"    expected {intent!r:18} got {predicted!r:18} ({how or 'unmatched'}) {command}")
+
+    backends = [False] + ([True] if _numpy_available() else [])
+    print(f"\n{'backend':<10}{'build ms':>10}{'p50 us':>9}{'p95 us':>9}{'max us':>9}")
+    commands = [command for _, command in rows]
+    for use_numpy in backends:
+        timed = IntentClassifier(use_numpy=use_numpy)
+        start = time.perf_counter()
+        timed.build()
+        build_ms = (time.perf_counter() - start) * 1000
+        samples = latency(timed, commands, args.repeat)
+        print(f"{'numpy' if use_numpy else 'python':<10}{build_ms:>10.2f}{statistics.median(samples):>9.1f}"
+              f"{percentile(samples, 0.95):>9.1f}{max(samples):>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmarks speech-recognition backends over a folder of WAV fixtures.
+
+    python bench_recognizers.py fixtures/ --backends vosk sphinx google --model models/vosk-model-small-en-us-0.15
+
+Each fixture is NAME.wav with its expected transcript in NAME.txt. Per backend
+it reports:
+
+  load        time to load the model (paid once at startup)
+  RTF         real-time factor: full decode time / audio duration (< 1 is faster than real time)
+  intent      time from handing over the audio to knowing the intent, with the
+              same early exit on streaming partials the assistant uses (p50 / p95)
+  intent ok   share of fixtures routed to the same intent as their expected transcript
+"""
+import argparse
+import glob
+import os
+import time
+
+import speech_recognition as sr
+
+from command_router import COMMAND_PRIORITIES, EARLY_TRIGGERS, build_router
+from recognizers import BACKENDS, get_backend, recognize_until
+
+WAKE_WORD = 'alexa'
+ROUTER = build_router({trigger: trigger for trigger in COMMAND_PRIORITIES})
+
+
+def clean(text):
+    return text.lower().replace(WAKE_WORD, '').strip()
+
+
+def intent_of(text):
+    match = ROUTER.match(clean(text))
+    return match.trigger if match else None
+
+
+def is_early(text):
+    return intent_of(text) in EARLY_TRIGGERS
+
+
+def load_fixtures(folder):
+    fixtures = []
+    reader = sr.Recognizer()
+    for path in sorted(glob.glob(os.path.join(folder, '*.wav'))):
+        transcript_path = os.path.splitext(path)[0] + '.txt'
+        if not os.path.exists(transcript_path):
+            continue
+        with open(transcript_path, encoding='utf-8') as f:
+            expected = f.read().strip()
+        with sr.AudioFile(path) as source:
+            audio = reader.record(source)
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        fixtures.append((path, audio, duration, expected))
+    return fixtures
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else float('nan')
+
+
+def bench_backend(backend, fixtures):
+    start = time.perf_counter()
+    backend.load()
+    load_s = time.perf_counter() - start
+
+    decode_total = audio_total = 0.0
+    intent_ms = []
+    correct = 0
+    for path, audio, duration, expected in fixtures:
+        start = time.perf_counter()
+        try:
+            backend.recognize(audio, path)
+        except sr.UnknownValueError:
+            pass
+        decode_total += time.perf_counter() - start
+        audio_total += duration
+
+        start = time.perf_counter()
+        try:
+            text = recognize_until(backend, audio, path, is_early)
+        except sr.UnknownValueError:
+            text = ''
+        intent_ms.append((time.perf_counter() - start) * 1000)
+        correct += intent_of(text) == intent_of(expected)
+
+    return {
+        'load_s': load_s,
+        'rtf': decode_total / audio_total if audio_total else float('nan'),
+        'p50_ms': percentile(intent_ms, 0.5),
+        'p95_ms': percentile(intent_ms, 0.95),
+        'accuracy': correct / len(fixtures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Real-time factor and command latency per recognizer backend.")
+    parser.add_argument('folder', help="Folder of NAME.wav fixtures with NAME.txt transcripts.")
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=['transcript', 'vosk', 'sphinx'])
+    parser.add_argument('--model', help="Model directory for the vosk backend.")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.folder)
+    if not fixtures:
+        parser.error(f"no WAV fixtures with .txt transcripts in {args.folder}")
+    total = sum(duration for _, _, duration, _ in fixtures)
+    print(f"{len(fixtures)} fixtures, {total:.1f} s of audio")
+    print(f"{'backend':<12} {'load s':>7} {'RTF':>7} {'intent p50 ms':>14} {'p95 ms':>9} {'intent ok':>10}")
+
+    for name in args.backends:
+        backend = get_backend(name, model_path=args.model) if name == 'vosk' else get_backend(name)
+        try:
+            result = bench_backend(backend, fixtures)
+        except (RuntimeError, sr.RequestError) as e:
+            print(f"{name:<12} skipped: {e}")
+            continue
+        print(f"{name:<12} {result['load_s']:>7.2f} {result['rtf']:>7.3f} {result['p50_ms']:>14.1f} "
+              f"{result['p95_ms']:>9.1f} {result['accuracy']:>9.0%}")
+
+
+if __name__ == '__main__':
+    main()
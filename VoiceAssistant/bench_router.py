@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: the original linear `trigger in command` scan over COMMAND_MAP
+versus the compiled CommandRouter, as the number of intents grows. The router
+column uses whichever mode the router picks (see LINEAR_MAX); the automaton
+column forces Aho-Corasick, to check where the two cross over.
+
+    python bench_router.py --intents 0 100 500 --commands 2000
+
+Synthetic intents are made-up two-word phrases added on top of the real
+triggers, so the linear scan has more keys to try on every command.
+"""
+import argparse
+import random
+import time
+
+from command_router import COMMAND_PRIORITIES, CommandRouter, build_router
+
+SAMPLE_COMMANDS = [
+    "what is the time",
+    "tell me a joke",
+    "play shape of you by ed sheeran",
+    "who the heck is ada lovelace",
+    "tell me about the eiffel tower",
+    "what is the date today",
+    "are you single",
+    "please stop listening",
+    "turn the kitchen lights on",
+    "how is the weather in london this afternoon",
+]
+WORDS = ("lights", "music", "timer", "alarm", "volume", "weather", "news", "calendar",
+         "kitchen", "bedroom", "garage", "thermostat", "reminder", "shopping", "radio")
+VERBS = ("set", "open", "close", "dim", "check", "start", "pause", "resume", "add", "read")
+
+
+def synthetic_triggers(count, rng):
+    triggers = set()
+    while len(triggers) < count:
+        triggers.add(f"{rng.choice(VERBS)} {rng.choice(WORDS)} {rng.randrange(1000)}")
+    return sorted(triggers)
+
+
+def linear_dispatch(command_map, command):
+    """The original dispatch loop: first trigger (in dict order) that is a substring wins."""
+    for trigger, handler in command_map.items():
+        if trigger in command:
+            return trigger
+    return None
+
+
+def timed(func, commands, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command in commands:
+            func(command)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(commands)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Linear trigger scan vs compiled command router.")
+    parser.add_argument('--intents', type=int, nargs='+', default=[0, 100, 500, 2000],
+                        help="Synthetic intents to add on top of the real triggers.")
+    parser.add_argument('--commands', type=int, default=2000, help="Commands per timing run.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    commands = [rng.choice(SAMPLE_COMMANDS) for _ in range(args.commands)]
+
+    print(f"{'intents':>8} {'linear us/cmd':>14} {'router us/cmd':>14} {'automaton us/cmd':>17} "
+          f"{'compile ms':>11} {'speedup':>8}")
+    for extra in args.intents:
+        command_map = {trigger: trigger for trigger in COMMAND_PRIORITIES}
+        command_map.update((trigger, trigger) for trigger in synthetic_triggers(extra, rng))
+
+        start = time.perf_counter()
+        router = build_router(command_map)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        linear = timed(lambda command: linear_dispatch(command_map, command), commands, args.repeat)
+        compiled = timed(router.match, commands, args.repeat)
+        automaton = CommandRouter(linear_max=0)
+        automaton.add_many(command_map, COMMAND_PRIORITIES)
+        forced = timed(automaton.compile().match, commands, args.repeat)
+        print(f"{len(command_map):>8} {linear:>14.2f} {compiled:>14.2f} {forced:>17.2f} "
+              f"{compile_ms:>11.2f} {linear / compiled:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Startup-time benchmark for the voice assistant.
+
+    python bench_startup.py                         # both entry points, lazy vs eager imports
+    python bench_startup.py --target app --importtime 15
+
+Each run is a fresh interpreter. For each entry point it reports:
+
+  import        time to import the module (what every start / worker fork pays)
+  first reply   import plus handling one command end to end
+  tts init      creating the pyttsx3 engine (VoiceCommand only; now deferred to first use)
+
+"eager" pre-imports pywhatkit, wikipedia and pyjokes first, as the modules
+used to. --importtime prints the slowest imports from `python -X importtime`.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY = ('pywhatkit', 'wikipedia', 'pyjokes')
+
+PROBES = {
+    'app': '''
+import json, time
+start = time.perf_counter()
+# PRELOAD
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+reply = client.post('/command', json={'command': COMMAND})
+assert reply.status_code == 200, reply.status_code
+done = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_reply': done - start}))
+''',
+    'VoiceCommand': '''
+import json, time
+start = time.perf_counter()
+# PRELOAD
+import VoiceCommand
+imported = time.perf_counter()
+VoiceCommand.talk = lambda text: None          # measure the handler, not speech output
+VoiceCommand.handle_command(COMMAND)
+done = time.perf_counter()
+try:
+    tts_start = time.perf_counter()
+    VoiceCommand.get_engine()
+    tts = time.perf_counter() - tts_start
+except Exception:
+    tts = None
+print(json.dumps({'import': imported - start, 'first_reply': done - start, 'tts_init': tts}))
+''',
+}
+
+
+def run_probe(target, command, eager):
+    preload = "".join(f"import {name}\n" for name in HEAVY) if eager else ""
+    code = f"COMMAND = {command!r}\n" + PROBES[target].replace("# PRELOAD\n", preload)
+    result = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'probe failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def importtime(target, top):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+                            cwd=HERE, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace('import time:', '|', 1).split('|'))
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    print(f"\nslowest imports for {target} (-X importtime)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+
+def fmt(seconds):
+    return f"{seconds * 1000:8.0f} ms" if seconds is not None else "     n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and time-to-first-reply of the assistant.")
+    parser.add_argument('--target', choices=sorted(PROBES), nargs='+', default=sorted(PROBES))
+    parser.add_argument('--command', default='tell me a joke', help="First command to handle.")
+    parser.add_argument('--runs', type=int, default=3, help="Fresh interpreters per measurement (median).")
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help="Show the N slowest imports.")
+    args = parser.parse_args()
+
+    print(f"{'target':<14} {'mode':<6} {'import':>11} {'first reply':>11} {'tts init':>11}")
+    for target in args.target:
+        for eager in (True, False):
+            try:
+                runs = [run_probe(target, args.command, eager) for _ in range(args.runs)]
+            except RuntimeError as e:
+                print(f"{target:<14} {'eager' if eager else 'lazy':<6} failed: {e}")
+                continue
+            median = {key: statistics.median(r[key] for r in runs) if runs[0].get(key) is not None else None
+                      for key in runs[0]}
+            print(f"{target:<14} {'eager' if eager else 'lazy':<6} {fmt(median['import'])} "
+                  f"{fmt(median['first_reply'])} {fmt(median.get('tts_init'))}")
+        if args.importtime:
+            importtime(target, args.importtime)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+False-accept / false-reject rates and CPU cost of the wake-word gate.
+
+    python bench_wake_word.py fixtures/ --templates wake_templates/ --backend vosk --model models/vosk-model-small-en-us-0.15
+
+Fixtures are NAME.wav with the words spoken in NAME.txt; a fixture is a
+positive when its transcript contains the wake word. Reports:
+
+  FA / FR       negatives the gate let through / positives it rejected
+  gate CPU      CPU time spent gating, per second of audio
+  recognizer    CPU time of the full recognizer on every phrase vs on gated phrases only
+
+With the template spotter, --sweep prints FA/FR across thresholds to pick --wake-threshold.
+"""
+import argparse
+import glob
+import os
+import time
+
+import speech_recognition as sr
+
+from recognizers import BACKENDS, get_backend
+from wake_word import SAMPLE_RATE, EnergyVAD, TemplateSpotter, VoskSpotter, WakeWordGate, pcm_samples
+
+WAKE_WORD = 'alexa'
+
+
+def load_fixtures(folder):
+    fixtures = []
+    reader = sr.Recognizer()
+    for path in sorted(glob.glob(os.path.join(folder, '*.wav'))):
+        transcript_path = os.path.splitext(path)[0] + '.txt'
+        expected = ''
+        if os.path.exists(transcript_path):
+            with open(transcript_path, encoding='utf-8') as f:
+                expected = f.read().strip().lower()
+        with sr.AudioFile(path) as source:
+            audio = reader.record(source)
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        fixtures.append((path, audio, duration, WAKE_WORD in expected))
+    return fixtures
+
+
+def recognizer_cpu(backend, items):
+    start = time.thread_time()
+    for path, audio in items:
+        try:
+            backend.recognize(audio, path)
+        except (sr.UnknownValueError, sr.RequestError):
+            pass
+    return time.thread_time() - start
+
+
+def rates(accepted, positives):
+    false_accepts = sum(1 for a, p in zip(accepted, positives) if a and not p)
+    false_rejects = sum(1 for a, p in zip(accepted, positives) if p and not a)
+    negatives = positives.count(False)
+    return (false_accepts / negatives if negatives else 0.0,
+            false_rejects / positives.count(True) if True in positives else 0.0)
+
+
+def sweep(spotter, fixtures, steps):
+    vad = EnergyVAD()
+    scores, positives = [], []
+    for _, audio, _, positive in fixtures:
+        samples = pcm_samples(audio)
+        span = vad.speech_span(samples)
+        scores.append(spotter.score(samples[int(span[0] * SAMPLE_RATE):])[0] if span else float('inf'))
+        positives.append(positive)
+    finite = sorted(score for score in scores if score != float('inf'))
+    if not finite:
+        return
+    print(f"\n{'threshold':>10} {'FA':>7} {'FR':>7}")
+    best = None
+    for i in range(steps + 1):
+        threshold = finite[0] + (finite[-1] - finite[0]) * i / steps
+        fa, fr = rates([score <= threshold for score in scores], positives)
+        print(f"{threshold:>10.2f} {fa:>7.1%} {fr:>7.1%}")
+        if best is None or abs(fa - fr) < best[0]:
+            best = (abs(fa - fr), threshold)
+    print(f"suggested --wake-threshold (FA ~= FR): {best[1]:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wake-word gate accuracy and CPU cost on WAV fixtures.")
+    parser.add_argument('folder', help="Folder of NAME.wav fixtures with NAME.txt transcripts.")
+    parser.add_argument('--spotter', choices=['template', 'vosk'], default='template')
+    parser.add_argument('--templates', default='wake_templates', help="Wake-word recordings for the template spotter.")
+    parser.add_argument('--threshold', type=float, help="Template match threshold.")
+    parser.add_argument('--model', help="Vosk model directory (vosk spotter/backend).")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), help="Recognizer to measure the CPU saving against.")
+    parser.add_argument('--sweep', type=int, default=0, metavar='STEPS', help="Print FA/FR over STEPS thresholds.")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.folder)
+    if not fixtures:
+        parser.error(f"no WAV fixtures in {args.folder}")
+    if args.spotter == 'vosk':
+        spotter = VoskSpotter(WAKE_WORD, model_path=args.model)
+    else:
+        options = {} if args.threshold is None else {'threshold': args.threshold}
+        spotter = TemplateSpotter.from_wavs(sorted(glob.glob(os.path.join(args.templates, '*.wav'))), **options)
+
+    # Fixtures are independent phrases, so no follow-up window between them.
+    gate = WakeWordGate(EnergyVAD(), spotter, follow_window=0)
+    admitted, accepted, positives = [], [], []
+    for path, audio, _, positive in fixtures:
+        decision, gated_audio = gate.check(audio)
+        accepted.append(decision in ('wake', 'armed'))
+        positives.append(positive)
+        if gated_audio is not None:
+            admitted.append((path, gated_audio))
+
+    total_audio = sum(duration for _, _, duration, _ in fixtures)
+    fa, fr = rates(accepted, positives)
+    print(f"{len(fixtures)} fixtures ({positives.count(True)} with the wake word), {total_audio:.1f} s of audio")
+    print(f"false accepts {fa:.1%}   false rejects {fr:.1%}   decisions {gate.stats()}")
+    print(f"gate CPU: {gate.cpu_seconds * 1000 / total_audio:.1f} ms per audio second")
+
+    if args.backend:
+        backend = get_backend(args.backend, model_path=args.model) if args.backend == 'vosk' else get_backend(args.backend)
+        backend.load()
+        everything = recognizer_cpu(backend, [(path, audio) for path, audio, _, _ in fixtures])
+        gated = recognizer_cpu(backend, admitted)
+        print(f"{args.backend} CPU: {everything:.2f} s on every phrase, {gated:.2f} s after gating "
+              f"(+{gate.cpu_seconds:.2f} s gate), {len(admitted)}/{len(fixtures)} phrases recognized")
+
+    if args.sweep and isinstance(spotter, TemplateSpotter):
+        sweep(spotter, fixtures, args.sweep)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Latency of Wikipedia lookups through offload.SummaryLookup, using a local stub
+in place of the wikipedia client (no network needed).
+
+    python bench_wiki_cache.py --latency 0.3 --queries 50 --repeat 20
+
+Reports cold (miss) latency, warm (cached) latency, and checks that a lookup
+slower than the handler timeout fails fast with HandlerTimeout.
+"""
+import argparse
+import time
+
+from offload import HandlerTimeout, Offloader, SummaryLookup
+from expiring_cache import ExpiringCache
+
+
+class StubWikipedia:
+    """Stand-in for wikipedia.summary with a fixed latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def summary(self, query):
+        self.calls += 1
+        time.sleep(self.latency)
+        return f"{query.strip().title()} is a stub article."
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold vs cached Wikipedia summary lookups against a stub.")
+    parser.add_argument('--latency', type=float, default=0.3, help="Stub lookup latency (s).")
+    parser.add_argument('--queries', type=int, default=50, help="Distinct queries.")
+    parser.add_argument('--repeat', type=int, default=20, help="Cached lookups per query.")
+    parser.add_argument('--timeout', type=float, default=1.0, help="Handler timeout for the 'wikipedia' kind (s).")
+    args = parser.parse_args()
+
+    stub = StubWikipedia(args.latency)
+    offloader = Offloader(timeouts={'wikipedia': args.timeout})
+    lookup = SummaryLookup(stub.summary, offloader, ExpiringCache(max_size=args.queries * 2), ttl=3600)
+    queries = [f"person {i}" for i in range(args.queries)]
+
+    cold = []
+    for query in queries:
+        start = time.perf_counter()
+        lookup.get(query)
+        cold.append(time.perf_counter() - start)
+
+    warm = []
+    for _ in range(args.repeat):
+        for query in queries:
+            # Differently spelled repeats normalize to the same cache entry.
+            start = time.perf_counter()
+            lookup.get(f"  {query.upper()}? ")
+            warm.append(time.perf_counter() - start)
+
+    assert stub.calls == len(queries), f"expected {len(queries)} upstream calls, got {stub.calls}"
+    print(f"cold: p50 {percentile(cold, 0.5) * 1e3:8.2f} ms   p99 {percentile(cold, 0.99) * 1e3:8.2f} ms")
+    print(f"warm: p50 {percentile(warm, 0.5) * 1e6:8.2f} us   p99 {percentile(warm, 0.99) * 1e6:8.2f} us")
+    print(f"upstream calls: {stub.calls}  cache: {lookup.cache.stats()}")
+
+    stub.latency = args.timeout * 3
+    start = time.perf_counter()
+    try:
+        lookup.get("a very slow page")
+        raise AssertionError("slow lookup should have timed out")
+    except HandlerTimeout as e:
+        print(f"slow lookup gave up after {time.perf_counter() - start:.2f} s: {e}")
+    assert lookup.cache.get("a very slow page") is None, "timeouts must not be cached"
+    print(f"offload: {offloader.stats()}")
+    offloader.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Server-sent event (SSE) streams for the command API.
+
+A client opens one long-lived GET /command/stream?client=<id> connection and
+posts commands to /command/stream/<id>. Replies, plus progress messages
+from slow handlers, are pushed down the open stream as soon as they are
+ready:
+
+    event: partial
+    data: {"id": "3", "text": "Searching Wikipedia for ada lovelace..."}
+
+    event: reply
+    data: {"id": "3", "command_received": "...", "assistant_response": "..."}
+
+Each client has its own bounded queue; a client that stops reading loses
+its oldest events rather than blocking the handlers.
+"""
+import json
+import queue
+import threading
+import uuid
+
+HEARTBEAT_SECONDS = 15.0
+QUEUE_SIZE = 256
+
+
+def format_event(event, data):
+    """One SSE message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StreamHub:
+
+    def __init__(self, queue_size=QUEUE_SIZE, heartbeat=HEARTBEAT_SECONDS):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def register(self, client_id=None):
+        """
+        Creates the queue for a client and returns its id (a new one if none is
+        given), or None if the id already has a stream. Check and insert happen
+        under one lock, so two requests for the same id cannot both succeed.
+        """
+        client_id = client_id or uuid.uuid4().hex
+        with self._lock:
+            if client_id in self._clients:
+                return None
+            self._clients[client_id] = queue.Queue(maxsize=self.queue_size)
+        return client_id
+
+    def unregister(self, client_id):
+        with self._lock:
+            self._clients.pop(client_id, None)
+
+    def __contains__(self, client_id):
+        with self._lock:
+            return client_id in self._clients
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+    def publish(self, client_id, event, data):
+        """Queues an event for one client. Returns False if the client is gone."""
+        with self._lock:
+            events = self._clients.get(client_id)
+        if events is None:
+            return False
+        message = format_event(event, data)
+        while True:
+            try:
+                events.put_nowait(message)
+                return True
+            except queue.Full:
+                try:
+                    events.get_nowait()
+                    with self._lock:
+                        self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def events(self, client_id=None):
+        """
+        Registers the client and yields its SSE messages until the connection
+        closes, with comment heartbeats so proxies keep it open.
+
+        Registration happens on the first read, so a response that is never
+        sent leaves nothing behind. If the id is already taken the stream
+        carries a single 'error' event.
+        """
+        registered = self.register(client_id)
+        if registered is None:
+            yield format_event('error', {'error': f"Client '{client_id}' already has an open stream"})
+            return
+        client_id = registered
+        with self._lock:
+            events = self._clients[client_id]
+        try:
+            yield format_event('ready', {'client': client_id})
+            while True:
+                try:
+                    yield events.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            # Runs when the client disconnects (the server closes the generator).
+            self.unregister(client_id)
@@ -0,0 +1,64 @@
+"""
+Small LRU cache for the assistant whose entries carry their own expiry time.
+
+Callers decide when each entry goes stale: the intent cache stores replies
+until a wall-clock boundary (the next minute, midnight), and SummaryLookup
+stores Wikipedia summaries for a fixed time. The cache only evicts the least
+recently used entry when full and drops expired entries on access.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ExpiringCache:
+
+    def __init__(self, max_size=1024, clock=time.time):
+        if max_size <= 0:
+            raise ValueError("Cache size must be positive.")
+        self.max_size = max_size
+        self.clock = clock
+        self._data = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """The value stored for `key`, or `default` if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= self.clock():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, expires_at):
+        """Stores `value` until `expires_at` (on the cache's clock)."""
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
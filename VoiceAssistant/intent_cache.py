@@ -0,0 +1,148 @@
+"""
+Intent-level response cache.
+
+Each handler may declare how its reply can be reused with @cache_policy:
+
+    STATIC        the same reply every time (relationship_status, default_response)
+    PER_MINUTE    fixed until the clock minute changes (get_time)
+    PER_DAY       fixed until local midnight (get_date)
+    BY_ARGUMENTS  keyed on the normalized command text, for a while (wikipedia_search)
+
+Handlers without a policy (jokes, playing music) always run. A handler can
+call dont_cache() to keep one particular reply out of the cache, e.g. an
+error message. Every cached reply knows when it expires, which the API turns
+into Cache-Control max-age.
+"""
+import contextvars
+import datetime
+import os
+import re
+import threading
+import time
+
+from expiring_cache import ExpiringCache
+
+STATIC_TTL = float(os.environ.get('INTENT_CACHE_STATIC_TTL', str(24 * 3600)))
+ARGUMENTS_TTL = float(os.environ.get('INTENT_CACHE_ARGUMENTS_TTL', '3600'))
+CACHE_SIZE = int(os.environ.get('INTENT_CACHE_SIZE', '4096'))
+
+# Set while a cacheable handler runs; dont_cache() flips it.
+_storable = contextvars.ContextVar('intent_cache_storable', default=None)
+
+
+class CachePolicy:
+    """Reply depends on nothing: one entry per intent, kept for `ttl` seconds."""
+
+    def __init__(self, name, ttl=STATIC_TTL):
+        self.name = name
+        self.ttl = ttl
+
+    def key(self, command, now):
+        return None
+
+    def expires_at(self, now):
+        return now + self.ttl
+
+    def __repr__(self):
+        return f"<cache policy {self.name}>"
+
+
+class TimeBucketPolicy(CachePolicy):
+    """Reply is fixed within a local clock minute or day."""
+
+    def __init__(self, unit):
+        if unit not in ('minute', 'day'):
+            raise ValueError("unit must be 'minute' or 'day'")
+        super().__init__(f"per-{unit}", ttl=None)
+        self.unit = unit
+
+    def _bucket_start(self, now):
+        moment = datetime.datetime.fromtimestamp(now)
+        if self.unit == 'minute':
+            return moment.replace(second=0, microsecond=0)
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def key(self, command, now):
+        return self._bucket_start(now).isoformat()
+
+    def expires_at(self, now):
+        step = datetime.timedelta(minutes=1) if self.unit == 'minute' else datetime.timedelta(days=1)
+        return (self._bucket_start(now) + step).timestamp()
+
+
+class ArgumentPolicy(CachePolicy):
+    """Reply depends on the command text (e.g. who to look up)."""
+
+    def key(self, command, now):
+        return re.sub(r'\s+', ' ', command.lower()).strip()
+
+
+STATIC = CachePolicy('static')
+PER_MINUTE = TimeBucketPolicy('minute')
+PER_DAY = TimeBucketPolicy('day')
+BY_ARGUMENTS = ArgumentPolicy('by-arguments', ttl=ARGUMENTS_TTL)
+
+
+def cache_policy(policy):
+    """Decorator declaring how a handler's reply may be cached."""
+    def decorate(handler):
+        handler.cache_policy = policy
+        return handler
+    return decorate
+
+
+def dont_cache():
+    """Called from a handler: keep the reply it is producing out of the cache."""
+    storable = _storable.get()
+    if storable is not None:
+        storable[0] = False
+
+
+class IntentCache:
+
+    def __init__(self, max_size=CACHE_SIZE, clock=time.time):
+        self._clock = clock
+        # The cache runs on the same wall clock, since expiries are wall-clock bucket ends.
+        self._cache = ExpiringCache(max_size=max_size, clock=clock)
+        self._lock = threading.Lock()
+        self.bypassed = 0
+
+    def respond(self, handler, command, produce):
+        """
+        Returns (reply, expires_at). On a hit produce() is not called at all;
+        otherwise it runs the handler and returns its reply. expires_at is
+        None when the reply must not be reused.
+        """
+        policy = getattr(handler, 'cache_policy', None)
+        if policy is None:
+            with self._lock:
+                self.bypassed += 1
+            return produce(), None
+
+        now = self._clock()
+        key = (handler.__name__, policy.key(command, now))
+        entry = self._cache.get(key)
+        if entry is not None:
+            return entry
+
+        storable = [True]
+        token = _storable.set(storable)
+        try:
+            reply = produce()
+        finally:
+            _storable.reset(token)
+        if not storable[0]:
+            return reply, None
+
+        expires_at = policy.expires_at(now)
+        self._cache.put(key, (reply, expires_at), expires_at)
+        return reply, expires_at
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        stats = self._cache.stats()
+        with self._lock:
+            stats['bypassed'] = self.bypassed
+        return stats
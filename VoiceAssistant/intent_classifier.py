@@ -0,0 +1,246 @@
+"""
+Fuzzy intent matching for commands the trigger router misses.
+
+Paraphrases and recognition errors ("tell me a jok", "what's the clock") contain
+no exact trigger, so they used to fall through to default_response. The
+classifier compares the command with example utterances of each intent using
+TF-IDF weighted character n-grams, which tolerate misspellings and partial
+words, and returns the intent of the nearest example:
+
+    classifier = IntentClassifier(INTENT_EXAMPLES)
+    prediction = classifier.classify("what's the clock")   # -> Prediction(intent='time', score=0.88, ...)
+
+Example vectors are computed once (build(), or lazily on the first classify).
+With numpy they form one matrix and a lookup is a single gather-and-dot over
+the columns of the command's n-grams; without it an inverted index does the
+same with dictionaries. Either way a lookup stays well under a millisecond
+(see bench_intents.py).
+
+Only intents that ignore the rest of the sentence are covered: for 'play' or
+'tell me about' a paraphrase gives the handler no reliable argument, so those
+still need their trigger. Exit intents are never matched fuzzily (see
+EXACT_ONLY): a misheard sentence must not shut the assistant down.
+
+A command is matched only if its nearest example is similar enough
+(MIN_SCORE) and clearly closer than the nearest example of any other label,
+out-of-scope anchors included (MIN_MARGIN). Words the examples never use
+count against the similarity, so "what is the date of the moon landing" is
+not mistaken for "what's the date".
+"""
+import importlib.util
+import math
+import re
+import threading
+
+NGRAM_SIZES = (2, 3, 4)
+MIN_SCORE = 0.5    # cosine similarity below which a command is left unmatched
+MIN_MARGIN = 0.1   # lead over the nearest example of any other label (or anchor)
+
+# Intents that must be said with their exact trigger, never guessed.
+EXACT_ONLY = frozenset({'goodbye', 'stop listening', 'stop', 'exit'})
+
+# Keys are triggers from COMMAND_MAP, so a prediction maps straight to a handler.
+INTENT_EXAMPLES = {
+    'time': [
+        "what time is it", "what's the time", "tell me the time", "what is the current time",
+        "do you have the time", "what's the clock say", "check the clock", "what hour is it",
+        "how late is it", "current time please", "time please", "what time do you have",
+    ],
+    'date': [
+        "what's the date", "what is today's date", "what day is it", "which day is it today",
+        "what day of the week is it", "what's today", "tell me the date", "what month is it",
+        "what is the date today", "today's date please", "which date is it",
+    ],
+    'joke': [
+        "tell me a joke", "tell me something funny", "make me laugh", "say something funny",
+        "do you know any jokes", "i want to hear a joke", "cheer me up", "another joke",
+        "got any jokes", "be funny", "tell me a funny one", "amuse me",
+    ],
+    'are you single': [
+        "are you single", "do you have a boyfriend", "do you have a girlfriend", "are you married",
+        "are you in a relationship", "will you go out with me", "are you seeing someone",
+        "do you have a partner", "will you marry me", "are you dating anyone",
+    ],
+    # Anchors for requests the assistant has no intent for. A command whose nearest
+    # example is one of these is left unmatched rather than forced onto the closest intent.
+    # Exit phrasings are anchors too: leaving takes an exact trigger ("goodbye", "stop listening").
+    None: [
+        "bye", "see you later", "good night", "shut down", "that's all", "quit", "turn off",
+        "go to sleep", "we're done",
+        "what's the weather like", "will it rain tomorrow", "turn on the lights", "switch off the lamp",
+        "set an alarm", "start a countdown", "remind me later", "what's your name", "how are you",
+        "who made you", "call my brother", "send a text", "open the door", "lock the front door",
+        "what is the capital of spain", "how do i fix this", "how many people live there",
+        "how old is the universe", "add bread to my list", "buy some groceries", "volume up",
+        "turn it down", "drive me home", "directions to work", "what does that mean",
+        "play a song", "play some music", "who is that", "tell me about history",
+    ],
+}
+
+
+class Prediction:
+    __slots__ = ('intent', 'score', 'example', 'margin')
+
+    def __init__(self, intent, score, example, margin):
+        self.intent = intent
+        self.score = score
+        self.example = example
+        self.margin = margin
+
+    def __repr__(self):
+        return (f"Prediction(intent={self.intent!r}, score={self.score:.2f}, margin={self.margin:.2f}, "
+                f"example={self.example!r})")
+
+
+def normalize(text):
+    """Lowercases and keeps letters, digits and single spaces ("What's  the time?" -> "whats the time")."""
+    text = text.lower().replace("'", '')
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def char_ngrams(text, sizes=NGRAM_SIZES):
+    """Counts of the character n-grams of each word, padded with spaces so word starts and ends count."""
+    counts = {}
+    for word in normalize(text).split():
+        padded = f' {word} '
+        for n in sizes:
+            for i in range(len(padded) - n + 1):
+                gram = padded[i:i + n]
+                counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def _numpy_available():
+    return importlib.util.find_spec('numpy') is not None
+
+
+class IntentClassifier:
+    """
+    Nearest-neighbour classifier over example utterances.
+
+    use_numpy: True/False forces the backend; None uses numpy when it is installed.
+    """
+
+    def __init__(self, examples=INTENT_EXAMPLES, min_score=MIN_SCORE, min_margin=MIN_MARGIN, sizes=NGRAM_SIZES,
+                 use_numpy=None):
+        unsafe = EXACT_ONLY.intersection(examples)
+        if unsafe:
+            raise ValueError(f"Intents {sorted(unsafe)} need their exact trigger and cannot have fuzzy examples.")
+        self.examples = {intent: list(utterances) for intent, utterances in examples.items()}
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.sizes = sizes
+        self.use_numpy = _numpy_available() if use_numpy is None else use_numpy
+        self._lock = threading.Lock()
+        self._built = False
+
+    def __len__(self):
+        return sum(len(utterances) for utterances in self.examples.values())
+
+    # --- Index ---
+
+    def _weights(self, counts):
+        """
+        Sublinear TF-IDF weights of the known n-grams, L2-normalized. Unknown
+        n-grams get the highest idf and count towards the norm, so words no
+        example uses lower every similarity. {} if nothing is known.
+        """
+        idf, unseen = self._idf, self._unseen_idf
+        weights, norm = {}, 0.0
+        for gram, count in counts.items():
+            weight = (1 + math.log(count)) * idf.get(gram, unseen)
+            norm += weight * weight
+            if gram in idf:
+                weights[gram] = weight
+        norm = math.sqrt(norm)
+        return {gram: w / norm for gram, w in weights.items()} if weights else {}
+
+    def build(self):
+        """Precomputes the example vectors. Called lazily by classify(); call it (or prewarm it) to avoid the first-call cost."""
+        with self._lock:
+            if self._built:
+                return self
+            labels, texts, documents = [], [], []
+            for intent, utterances in self.examples.items():
+                for utterance in utterances:
+                    labels.append(intent)
+                    texts.append(utterance)
+                    documents.append(char_ngrams(utterance, self.sizes))
+
+            document_frequency = {}
+            for counts in documents:
+                for gram in counts:
+                    document_frequency[gram] = document_frequency.get(gram, 0) + 1
+            total = len(documents)
+            self._idf = {gram: math.log((1 + total) / (1 + df)) + 1 for gram, df in document_frequency.items()}
+            self._unseen_idf = math.log(1 + total) + 1
+            self._columns = {gram: i for i, gram in enumerate(sorted(self._idf))}
+            self._labels = labels
+            self._texts = texts
+            vectors = [self._weights(counts) for counts in documents]
+
+            if self.use_numpy:
+                import numpy as np
+                self._np = np
+                label_ids = {}
+                self._label_ids = np.array([label_ids.setdefault(label, len(label_ids)) for label in labels])
+                self._matrix = np.zeros((len(vectors), len(self._columns)))
+                for row, vector in enumerate(vectors):
+                    for gram, weight in vector.items():
+                        self._matrix[row, self._columns[gram]] = weight
+            else:
+                postings = {}
+                for row, vector in enumerate(vectors):
+                    for gram, weight in vector.items():
+                        postings.setdefault(gram, []).append((row, weight))
+                self._postings = postings
+            self._built = True
+        return self
+
+    # --- Scoring ---
+
+    def _nearest(self, query):
+        """
+        (row, cosine similarity) of the closest example and the similarity of the
+        closest example with a different label, or (None, 0.0, 0.0).
+        """
+        if not query:
+            return None, 0.0, 0.0
+        if self.use_numpy:
+            np = self._np
+            columns = [self._columns[gram] for gram in query]
+            scores = self._matrix[:, columns] @ np.fromiter(query.values(), dtype=float, count=len(query))
+            row = int(scores.argmax())
+            others = scores[self._label_ids != self._label_ids[row]]
+            return row, float(scores[row]), float(others.max()) if others.size else 0.0
+        scores = {}
+        for gram, query_weight in query.items():
+            for row, weight in self._postings[gram]:
+                scores[row] = scores.get(row, 0.0) + query_weight * weight
+        if not scores:
+            return None, 0.0, 0.0
+        row = max(scores, key=scores.get)
+        label = self._labels[row]
+        runner_up = max((score for other, score in scores.items() if self._labels[other] != label), default=0.0)
+        return row, scores[row], runner_up
+
+    def score(self, command):
+        """
+        The nearest example's Prediction regardless of min_score, or None if no
+        n-gram is known. Its intent is None when the nearest example is an
+        out-of-scope anchor.
+        """
+        if not self._built:
+            self.build()
+        row, similarity, runner_up = self._nearest(self._weights(char_ngrams(command, self.sizes)))
+        if row is None:
+            return None
+        return Prediction(self._labels[row], similarity, self._texts[row], similarity - runner_up)
+
+    def classify(self, command):
+        """The Prediction for `command` if it is close enough to one intent's examples and no other, else None."""
+        prediction = self.score(command)
+        if (prediction is None or prediction.intent is None or prediction.score < self.min_score
+                or prediction.margin < self.min_margin):
+            return None
+        return prediction
@@ -0,0 +1,75 @@
+"""
+Lazy imports for slow handler dependencies.
+
+pywhatkit, wikipedia and pyjokes are only needed once a matching command
+arrives, but importing them up front costs seconds on every start (pywhatkit
+also probes the network on import). lazy_import() returns a stand-in module
+that performs the real import on first attribute access:
+
+    pywhatkit = lazy_import('pywhatkit')
+    ...
+    pywhatkit.playonyt(song)      # imported here, once
+
+prewarm() loads them on a background thread once the assistant is up, so
+the first command that needs one usually finds it already imported.
+"""
+import importlib
+import threading
+import time
+import types
+
+
+class LazyModule(types.ModuleType):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['load_seconds'] = None
+
+    @property
+    def is_loaded(self):
+        return self.__dict__['_lazy_module'] is not None
+
+    def load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['load_seconds'] = time.perf_counter() - start
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+def prewarm(*targets, delay=0.0):
+    """
+    Loads lazy modules (or calls zero-argument functions) on a daemon thread
+    after `delay` seconds. Failures are logged, not raised: the command that
+    needs the dependency will report it.
+    """
+    def run():
+        if delay:
+            time.sleep(delay)
+        for target in targets:
+            try:
+                target.load() if isinstance(target, LazyModule) else target()
+            except Exception as e:
+                print(f"[Prewarm] {getattr(target, '__name__', target)} failed: {e}")
+
+    thread = threading.Thread(target=run, name='assistant-prewarm', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,360 @@
+"""
+Low-overhead instrumentation for the assistant backend.
+
+Counters and fixed-bucket histograms live in a Registry and are rendered in
+the Prometheus text format for GET /metrics:
+
+    REQUESTS = REGISTRY.counter('assistant_commands_total', 'Commands handled.', ('intent',))
+    LATENCY = REGISTRY.histogram('assistant_intent_seconds', 'Time per intent.', ('intent',))
+
+    REQUESTS.inc(intent='get_time')
+    with LATENCY.time(intent='get_time'):
+        ...
+
+Recording is a bisect, two additions and a lock per observation, so it can
+stay on in production.
+
+SlowRequestProfiler is opt-in. While a tracked request runs, a background
+thread samples its stack (and the stacks of any worker threads attached to
+it) every few milliseconds. When the request turns out slower than the
+threshold, the samples are written as folded stacks, one file per request,
+ready for flamegraph.pl or speedscope.
+"""
+import bisect
+import contextvars
+import itertools
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Prometheus' default latency buckets, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Finer buckets for sub-millisecond work such as trigger matching.
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# --- Metrics ---
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def collect(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = self.header()
+        for key, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # label values -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall time of the with-block, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """{'count', 'sum', 'buckets': [(upper bound, cumulative count), ...]} for one label set."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            counts, total, count = (list(series[0]), series[1], series[2]) if series else ([0] * (len(self.buckets) + 1), 0.0, 0)
+        cumulative, running = [], 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {'count': count, 'sum': total, 'buckets': cumulative}
+
+    def collect(self):
+        with self._lock:
+            series = sorted((key, list(s[0]), s[1], s[2]) for key, s in self._series.items())
+        lines = self.header()
+        for key, counts, total, count in series:
+            running = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                running += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f'{self.name}_bucket{labels} {running}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    """
+    Holds metrics plus collector callbacks. A collector returns
+    (name, type, help, [(labels dict, value), ...]) tuples and is read at
+    scrape time, which suits counters other modules already keep
+    (e.g. ExpiringCache.stats()).
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect):
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        # Samples of the same family from several collector entries go under one HELP/TYPE header.
+        families = {}
+        for collect in collectors:
+            try:
+                collected = collect()
+            except Exception as e:
+                print(f"[Metrics] collector failed: {e}")
+                continue
+            for name, kind, documentation, samples in collected:
+                families.setdefault(name, (kind, documentation, []))[2].extend(samples)
+        for name, (kind, documentation, samples) in families.items():
+            lines += [f'# HELP {name} {documentation}', f'# TYPE {name} {kind}']
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+REGISTRY = Registry()
+
+
+# --- Sampling Profiler ---
+
+PROFILE_SLOW_MS = float(os.environ.get('ASSISTANT_PROFILE_SLOW_MS', '0'))   # 0 = profiler off
+PROFILE_INTERVAL = float(os.environ.get('ASSISTANT_PROFILE_INTERVAL_MS', '5')) / 1000
+PROFILE_DIR = os.environ.get('ASSISTANT_PROFILE_DIR', 'profiles')
+
+_session = contextvars.ContextVar('profiler_session', default=None)
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def fold_stack(frame, prefix=None):
+    """'outer;...;inner' for a frame, root first, as flame-graph tools expect."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    if prefix:
+        labels.append(prefix)
+    return ';'.join(reversed(labels))
+
+
+class _Session:
+    __slots__ = ('name', 'threads', 'stacks', 'started')
+
+    def __init__(self, name, started):
+        self.name = name
+        self.threads = {}    # thread id -> prefix for its stacks
+        self.stacks = {}     # folded stack -> samples
+        self.started = started
+
+
+class SlowRequestProfiler:
+    """
+    Samples the stacks of tracked requests with sys._current_frames() and keeps
+    the samples of requests slower than `threshold_ms`.
+
+        with PROFILER.track('wikipedia_search'):
+            handler(command)
+
+    Work a request hands to another thread shows up too if that thread runs
+    inside `PROFILER.attach()` under the request's (copied) context.
+    """
+
+    def __init__(self, threshold_ms=PROFILE_SLOW_MS, interval=PROFILE_INTERVAL, directory=PROFILE_DIR,
+                 clock=time.perf_counter):
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.directory = directory
+        self._clock = clock
+        self._sessions = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._dump_ids = itertools.count()
+        self.dumped = 0
+
+    @property
+    def enabled(self):
+        return self.threshold_ms > 0
+
+    def _ensure_sampler(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name='assistant-profiler', daemon=True)
+                self._thread.start()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            # Held for the whole pass so a finishing request never reads half-written samples.
+            with self._lock:
+                if not self._sessions:
+                    continue
+                frames = sys._current_frames()
+                for session in self._sessions:
+                    for ident, prefix in list(session.threads.items()):
+                        frame = frames.get(ident)
+                        if frame is None or ident == own:
+                            continue
+                        stack = fold_stack(frame, prefix)
+                        session.stacks[stack] = session.stacks.get(stack, 0) + 1
+                del frames
+
+    def track(self, name):
+        """Context manager that profiles the with-block as one request (a no-op when disabled)."""
+        if not self.enabled:
+            return nullcontext()
+        return self._track(name)
+
+    @contextmanager
+    def _track(self, name):
+        self._ensure_sampler()
+        session = _Session(name, self._clock())
+        session.threads[threading.get_ident()] = threading.current_thread().name
+        token = _session.set(session)
+        with self._lock:
+            self._sessions.add(session)
+        try:
+            yield session
+        finally:
+            with self._lock:
+                self._sessions.discard(session)
+            _session.reset(token)
+            elapsed_ms = (self._clock() - session.started) * 1000
+            if elapsed_ms >= self.threshold_ms and session.stacks:
+                # Profiling must never fail the request it observed.
+                try:
+                    self._dump(session, elapsed_ms)
+                except Exception as e:
+                    print(f"[Profiler] could not write stacks for {session.name}: {e}")
+
+    @contextmanager
+    def attach(self):
+        """Adds the current thread to the request being profiled in this context, if any."""
+        session = _session.get()
+        if session is None:
+            yield
+            return
+        ident = threading.get_ident()
+        session.threads[ident] = threading.current_thread().name
+        try:
+            yield
+        finally:
+            session.threads.pop(ident, None)
+
+    def _dump(self, session, elapsed_ms):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        # pid and a counter keep requests that finish in the same second from overwriting each other.
+        name = f"{stamp}-{session.name}-{elapsed_ms:.0f}ms-{os.getpid()}-{next(self._dump_ids)}.folded"
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(session.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        with self._lock:
+            self.dumped += 1
+        print(f"[Profiler] {session.name} took {elapsed_ms:.0f} ms; stacks written to {path}")
+        return path
+
+
+PROFILER = SlowRequestProfiler()
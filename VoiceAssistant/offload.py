@@ -0,0 +1,110 @@
+"""
+Runs slow, network-bound intent work (Wikipedia lookups, opening YouTube) on a
+shared thread pool so a stalled upstream cannot hold a request for seconds.
+
+    OFFLOAD.call('wikipedia', fetch_summary, 'ada lovelace')   # waits up to its timeout
+    OFFLOAD.submit('youtube', pywhatkit.playonyt, song)        # fire and forget
+
+Timeouts are per handler kind (HANDLER_TIMEOUTS, overridable from the
+environment). A call that times out raises HandlerTimeout; the work itself
+keeps running in the background and its result, if any, is discarded.
+"""
+import contextvars
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from expiring_cache import ExpiringCache
+
+MAX_WORKERS = int(os.environ.get('ASSISTANT_OFFLOAD_WORKERS', '8'))
+DEFAULT_TIMEOUT = 5.0
+HANDLER_TIMEOUTS = {
+    'wikipedia': float(os.environ.get('WIKI_TIMEOUT', '4')),
+    'youtube': float(os.environ.get('YOUTUBE_TIMEOUT', '10')),
+}
+WIKI_CACHE_SIZE = int(os.environ.get('WIKI_CACHE_SIZE', '1024'))
+WIKI_CACHE_TTL = float(os.environ.get('WIKI_CACHE_TTL', str(24 * 3600)))
+
+
+class HandlerTimeout(Exception):
+    """Raised when offloaded work does not finish within its handler's timeout."""
+
+
+class Offloader:
+
+    def __init__(self, max_workers=MAX_WORKERS, timeouts=None, default_timeout=DEFAULT_TIMEOUT):
+        self.timeouts = dict(HANDLER_TIMEOUTS if timeouts is None else timeouts)
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='assistant-offload')
+        self._lock = threading.Lock()
+        self.counters = {'submitted': 0, 'completed': 0, 'errors': 0, 'timeouts': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _on_done(self, kind, future):
+        if future.exception() is not None:
+            self._count('errors')
+            print(f"[Offload] {kind} failed: {future.exception()}")
+        else:
+            self._count('completed')
+
+    def submit(self, kind, func, *args, **kwargs):
+        """Starts func(*args) on the pool and returns its Future. The caller's context (e.g. the current request) is copied."""
+        self._count('submitted')
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, func, *args, **kwargs)
+        future.add_done_callback(lambda f: self._on_done(kind, f))
+        return future
+
+    def call(self, kind, func, *args, timeout=None, **kwargs):
+        """Runs func(*args) on the pool and waits for it, raising HandlerTimeout after the handler's timeout."""
+        if timeout is None:
+            timeout = self.timeouts.get(kind, self.default_timeout)
+        future = self.submit(kind, func, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            self._count('timeouts')
+            raise HandlerTimeout(f"{kind} did not respond within {timeout:g} s") from None
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
+
+
+def normalize_query(text):
+    """'  Ada   Lovelace? ' -> 'ada lovelace', so trivially different phrasings share a cache entry."""
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', text.lower())).strip()
+
+
+class SummaryLookup:
+    """
+    Wikipedia summaries through an LRU cache keyed on the normalized query,
+    each kept for `ttl` seconds.
+    Misses are fetched on the offload pool with the 'wikipedia' timeout; errors
+    (missing pages, timeouts) propagate and are not cached.
+    """
+
+    def __init__(self, fetch, offloader, cache=None, kind='wikipedia', ttl=WIKI_CACHE_TTL):
+        self.fetch = fetch
+        self.offloader = offloader
+        self.cache = cache if cache is not None else ExpiringCache(WIKI_CACHE_SIZE)
+        self.kind = kind
+        self.ttl = ttl
+
+    def get(self, query):
+        key = normalize_query(query)
+        summary = self.cache.get(key)
+        if summary is None:
+            summary = self.offloader.call(self.kind, self.fetch, query)
+            self.cache.put(key, summary, self.cache.clock() + self.ttl)
+        return summary
+
+
+OFFLOAD = Offloader()
@@ -0,0 +1,178 @@
+"""
+Speech-recognition backends for the desktop assistant.
+
+Every backend has the same small interface:
+
+    backend = get_backend('vosk', model_path='models/vosk-model-small-en-us-0.15')
+    backend.load()                       # load the model once, at startup
+    backend.recognize(audio)             # -> final text (raises sr.UnknownValueError if nothing heard)
+    for text, final in backend.stream(audio):
+        ...                              # growing partial transcripts, then the final one
+
+`audio` is a speech_recognition AudioData. Backends:
+
+  google      Google Web Speech via SpeechRecognition (network, no partials)
+  vosk        Kaldi models via vosk (offline, streaming partials)  pip install vosk
+  sphinx      CMU PocketSphinx via SpeechRecognition (offline)     pip install pocketsphinx
+  transcript  reads the expected text from a .txt next to each WAV (fixtures, no audio decoding)
+"""
+import json
+import os
+
+import speech_recognition as sr
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 0.1
+
+
+def pcm_chunks(audio, sample_rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS):
+    """Splits AudioData into 16-bit mono PCM chunks at `sample_rate`, as a streaming decoder would receive them."""
+    raw = audio.get_raw_data(convert_rate=sample_rate, convert_width=2)
+    step = int(sample_rate * chunk_seconds) * 2
+    for start in range(0, len(raw), step):
+        yield raw[start:start + step]
+
+
+class RecognizerBackend:
+    name = 'base'
+    streaming = False
+
+    def load(self):
+        """Loads models or opens clients. Called once; later calls are no-ops."""
+
+    def recognize(self, audio, source=None):
+        """Final transcript of `audio`. `source` is the WAV path when replaying fixtures."""
+        text = ''
+        for text, final in self.stream(audio, source):
+            pass
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def stream(self, audio, source=None):
+        """Yields (text, final) pairs. Non-streaming backends yield only the final result."""
+        yield self.recognize(audio, source), True
+
+
+class GoogleBackend(RecognizerBackend):
+    name = 'google'
+
+    def __init__(self, recognizer=None, language='en-US'):
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def recognize(self, audio, source=None):
+        return self.recognizer.recognize_google(audio, language=self.language)
+
+
+class SphinxBackend(RecognizerBackend):
+    name = 'sphinx'
+
+    def __init__(self, recognizer=None, language='en-US'):
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+        self._loaded = False
+
+    def load(self):
+        if self._loaded:
+            return
+        try:
+            import pocketsphinx  # noqa: F401  (fail at startup, not on the first command)
+        except ImportError:
+            raise RuntimeError("The sphinx backend needs pocketsphinx: pip install pocketsphinx") from None
+        self._loaded = True
+
+    def recognize(self, audio, source=None):
+        return self.recognizer.recognize_sphinx(audio, language=self.language)
+
+
+class VoskBackend(RecognizerBackend):
+    """Offline Kaldi decoding. The model is loaded once and shared by every utterance."""
+    name = 'vosk'
+    streaming = True
+
+    def __init__(self, model_path=None, sample_rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS):
+        self.model_path = model_path or os.environ.get('VOSK_MODEL')
+        self.sample_rate = sample_rate
+        self.chunk_seconds = chunk_seconds
+        self._model = None
+
+    def load(self):
+        if self._model is not None:
+            return
+        try:
+            import vosk
+        except ImportError:
+            raise RuntimeError("The vosk backend needs vosk: pip install vosk") from None
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self._model = vosk.Model(self.model_path) if self.model_path else vosk.Model(lang='en-us')
+
+    def stream(self, audio, source=None):
+        self.load()
+        decoder = self._vosk.KaldiRecognizer(self._model, self.sample_rate)
+        segments = []
+        for chunk in pcm_chunks(audio, self.sample_rate, self.chunk_seconds):
+            if decoder.AcceptWaveform(chunk):
+                text = json.loads(decoder.Result()).get('text', '')
+                if text:
+                    segments.append(text)
+                    yield ' '.join(segments), False
+            else:
+                partial = json.loads(decoder.PartialResult()).get('partial', '')
+                if partial:
+                    yield ' '.join(segments + [partial]), False
+        text = json.loads(decoder.FinalResult()).get('text', '')
+        if text:
+            segments.append(text)
+        yield ' '.join(segments), True
+
+
+class TranscriptBackend(RecognizerBackend):
+    """Fixture backend: the transcript is the .txt file next to the replayed WAV."""
+    name = 'transcript'
+
+    def recognize(self, audio, source=None):
+        if source is None:
+            raise sr.UnknownValueError()
+        try:
+            with open(os.path.splitext(source)[0] + '.txt', encoding='utf-8') as f:
+                text = f.read().strip()
+        except OSError:
+            raise sr.UnknownValueError() from None
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+def recognize_until(backend, audio, source=None, accept=None):
+    """
+    Transcribes `audio`, returning early with the first partial transcript for
+    which accept(text) is true (streaming backends only).
+    """
+    if not backend.streaming or accept is None:
+        return backend.recognize(audio, source)
+    text = ''
+    for text, final in backend.stream(audio, source):
+        if not final and accept(text):
+            return text
+    if not text:
+        raise sr.UnknownValueError()
+    return text
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'vosk': VoskBackend,
+    'sphinx': SphinxBackend,
+    'transcript': TranscriptBackend,
+}
+
+
+def get_backend(name, **options):
+    """Creates a backend by name; options go to its constructor."""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown recognizer backend '{name}'. Choose from: {', '.join(BACKENDS)}") from None
+    return backend_class(**options)
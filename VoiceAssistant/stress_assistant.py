@@ -0,0 +1,102 @@
+"""
+Concurrency stress check for the /command API.
+
+Starts app.py on a threaded local server with stand-ins for pywhatkit and
+wikipedia (no browser, no network) and fires many simultaneous requests.
+Every reply must belong to its own request: each Wikipedia query carries a
+unique token, and the stub summary echoes it back after a random delay so
+requests interleave.
+
+    pip install Flask flask-cors pyjokes
+    python stress_assistant.py --clients 32 --requests 500
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import types
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def install_stubs(max_delay):
+    """Registers fake pywhatkit/wikipedia modules so app.py imports without them."""
+    wikipedia = types.ModuleType('wikipedia')
+
+    class PageError(Exception):
+        pass
+
+    def summary(query, sentences=1, auto_suggest=False):
+        time.sleep(random.uniform(0, max_delay))
+        return f"Summary of {query}."
+
+    wikipedia.exceptions = types.SimpleNamespace(PageError=PageError)
+    wikipedia.summary = summary
+
+    pywhatkit = types.ModuleType('pywhatkit')
+    pywhatkit.playonyt = lambda song: time.sleep(random.uniform(0, max_delay))
+
+    sys.modules['wikipedia'] = wikipedia
+    sys.modules['pywhatkit'] = pywhatkit
+
+
+def start_server():
+    from werkzeug.serving import make_server
+    import app as assistant
+
+    server = make_server('127.0.0.1', 0, assistant.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/command"
+
+
+def post(url, command):
+    body = json.dumps({'command': command}).encode()
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def make_request(i):
+    """Returns (command, the text its reply must contain)."""
+    kind = i % 3
+    token = f"item{i}"
+    if kind == 0:
+        return f"tell me about {token}", f"Summary of {token}."
+    if kind == 1:
+        return f"who the heck is {token}", f"Summary of {token}."
+    return f"play {token}", f"Playing {token} on YouTube."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fire concurrent /command requests and check every reply.")
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--max-delay', type=float, default=0.02, help="Maximum stub handler latency (s).")
+    args = parser.parse_args()
+
+    install_stubs(args.max_delay)
+    server, url = start_server()
+
+    def check(i):
+        command, expected = make_request(i)
+        reply = post(url, command)
+        return reply['command_received'] == command and reply['assistant_response'].startswith(expected)
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            results = list(pool.map(check, range(args.requests)))
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    mismatches = results.count(False)
+    print(f"{args.requests} requests from {args.clients} clients in {elapsed:.2f} s "
+          f"({args.requests / elapsed:.0f} req/s): {mismatches} mismatched replies")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+Cheap wake-word gate in front of speech recognition.
+
+Every captured phrase used to be fully transcribed before checking for the
+wake word, so background chatter cost a full recognition each time. The
+gate screens each phrase first:
+
+  1. EnergyVAD: frame energy against an adaptive noise floor. Phrases with
+     no sustained speech are dropped outright.
+  2. A keyword spotter on the voiced start of the phrase:
+       TemplateSpotter  compares MFCC features against a few recordings of
+                        the wake word with subsequence DTW (needs numpy)
+       VoskSpotter      vosk decoding restricted to a one-word grammar
+  3. Only audio after the spotted wake word goes on to the recognizer. A
+     phrase that is just the wake word opens a short follow-up window in
+     which the next phrase is admitted without it.
+
+    gate = WakeWordGate(EnergyVAD(), TemplateSpotter.from_wavs(glob.glob('wake/*.wav')))
+    decision, audio = gate.check(audio)     # audio is None when rejected
+"""
+import json
+import math
+import threading
+import time
+from array import array
+
+import speech_recognition as sr
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+
+def pcm_samples(audio, sample_rate=SAMPLE_RATE):
+    """16-bit mono samples of an AudioData, resampled to `sample_rate`."""
+    samples = array('h')
+    samples.frombytes(audio.get_raw_data(convert_rate=sample_rate, convert_width=2))
+    return samples
+
+
+def trim_audio(audio, seconds):
+    """AudioData with the first `seconds` removed."""
+    offset = int(seconds * audio.sample_rate) * audio.sample_width
+    return sr.AudioData(audio.frame_data[offset:], audio.sample_rate, audio.sample_width)
+
+
+# --- Voice Activity Detection ---
+
+class EnergyVAD:
+    """
+    Frame-energy VAD. A frame is voiced when it is `margin_db` above the noise
+    floor (and above `min_db`); the floor tracks the quietest frames of recent
+    phrases.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, margin_db=12.0, min_db=-50.0,
+                 min_speech_ms=200, floor_db=-60.0, floor_smoothing=0.2):
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.frame_seconds = frame_ms / 1000
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.floor_db = floor_db
+        self.floor_smoothing = floor_smoothing
+        self._lock = threading.Lock()
+
+    def frame_db(self, samples):
+        """Energy of each frame in dBFS."""
+        frame = self.frame
+        count = len(samples) // frame
+        if np is not None:
+            x = np.frombuffer(samples, dtype=np.int16)[:count * frame].astype(np.float64).reshape(count, frame)
+            rms = np.sqrt((x * x).mean(axis=1)) / 32768.0
+            return (20 * np.log10(np.maximum(rms, 1e-10))).tolist()
+        levels = []
+        for i in range(count):
+            chunk = samples[i * frame:(i + 1) * frame]
+            rms = math.sqrt(sum(s * s for s in chunk) / frame) / 32768.0
+            levels.append(20 * math.log10(max(rms, 1e-10)))
+        return levels
+
+    def voiced(self, samples):
+        """Per-frame voiced flags; also updates the noise floor."""
+        levels = self.frame_db(samples)
+        if not levels:
+            return []
+        quiet = sorted(levels)[len(levels) // 10]
+        with self._lock:
+            self.floor_db += self.floor_smoothing * (quiet - self.floor_db)
+            threshold = max(self.min_db, self.floor_db + self.margin_db)
+        return [level > threshold for level in levels]
+
+    def speech_span(self, samples):
+        """(start, end) seconds of the voiced part, or None if no run of speech is long enough."""
+        flags = self.voiced(samples)
+        run = longest = 0
+        first = last = None
+        for i, flag in enumerate(flags):
+            if flag:
+                run += 1
+                longest = max(longest, run)
+                first = i if first is None else first
+                last = i
+            else:
+                run = 0
+        if longest < self.min_speech_frames:
+            return None
+        return first * self.frame_seconds, (last + 1) * self.frame_seconds
+
+
+# --- Keyword Spotting ---
+
+def _mel_filterbank(n_filters, n_fft, sample_rate):
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    mels = np.linspace(hz_to_mel(0), hz_to_mel(sample_rate / 2), n_filters + 2)
+    bins = np.floor((n_fft + 1) * (700 * (10 ** (mels / 2595) - 1)) / sample_rate).astype(int)
+    bank = np.zeros((n_filters, n_fft // 2 + 1))
+    for i in range(1, n_filters + 1):
+        left, center, right = bins[i - 1], bins[i], bins[i + 1]
+        for k in range(left, center):
+            bank[i - 1, k] = (k - left) / max(1, center - left)
+        for k in range(center, right):
+            bank[i - 1, k] = (right - k) / max(1, right - center)
+    return bank
+
+
+class TemplateSpotter:
+    """
+    Spots the wake word by subsequence DTW between MFCCs of the phrase's first
+    `search_seconds` and those of enrolled wake-word recordings. Lower scores
+    are closer; calibrate `threshold` with bench_wake_word.py.
+    """
+
+    def __init__(self, templates, threshold=15.0, sample_rate=SAMPLE_RATE, search_seconds=1.5,
+                 n_filters=24, n_ceps=13, frame_ms=25, hop_ms=10):
+        if np is None:
+            raise RuntimeError("TemplateSpotter needs numpy: pip install numpy")
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.search_seconds = search_seconds
+        self.n_ceps = n_ceps
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.hop = int(sample_rate * hop_ms / 1000)
+        self.hop_seconds = hop_ms / 1000
+        self.n_fft = 512
+        self._filters = _mel_filterbank(n_filters, self.n_fft, sample_rate)
+        n = np.arange(n_filters)
+        self._dct = np.cos(np.pi / n_filters * (n[:, None] + 0.5) * np.arange(n_ceps + 1)[None, :])
+        self._window = np.hamming(self.frame)
+        self.templates = [self.features(samples) for samples in templates]
+        if not self.templates:
+            raise ValueError("TemplateSpotter needs at least one wake-word recording.")
+
+    @classmethod
+    def from_wavs(cls, paths, **options):
+        reader = sr.Recognizer()
+        templates = []
+        sample_rate = options.get('sample_rate', SAMPLE_RATE)
+        vad = EnergyVAD(sample_rate)
+        for path in paths:
+            with sr.AudioFile(path) as source:
+                samples = pcm_samples(reader.record(source), sample_rate)
+            # Enroll only the spoken part so leading/trailing silence does not skew matching.
+            span = vad.speech_span(samples)
+            if span:
+                samples = samples[int(span[0] * sample_rate):int(span[1] * sample_rate)]
+            templates.append(samples)
+        return cls(templates, **options)
+
+    def features(self, samples):
+        """MFCCs without c0 (so loudness does not matter), one row per 10 ms hop."""
+        x = np.frombuffer(samples, dtype=np.int16).astype(np.float64) / 32768.0
+        if len(x) < self.frame:
+            x = np.pad(x, (0, self.frame - len(x)))
+        x = np.append(x[0], x[1:] - 0.97 * x[:-1])
+        count = 1 + (len(x) - self.frame) // self.hop
+        index = np.arange(self.frame)[None, :] + self.hop * np.arange(count)[:, None]
+        power = np.abs(np.fft.rfft(x[index] * self._window, self.n_fft)) ** 2 / self.n_fft
+        # No per-phrase mean normalization: the query window also holds the command, which would shift its mean.
+        return (np.log(power @ self._filters.T + 1e-10) @ self._dct)[:, 1:]
+
+    def _match(self, template, query):
+        """Best subsequence-DTW cost of `template` anywhere in `query`, per template frame, and where it ends."""
+        cost = np.sqrt(((template[:, None, :] - query[None, :, :]) ** 2).sum(axis=2)).tolist()
+        m, n = len(template), len(query)
+        previous = cost[0][:]          # free start: the word may begin at any query frame
+        for i in range(1, m):
+            row = cost[i]
+            current = [previous[0] + row[0]] + [0.0] * (n - 1)
+            for j in range(1, n):
+                current[j] = row[j] + min(previous[j], previous[j - 1], current[j - 1])
+            previous = current
+        end = min(range(n), key=previous.__getitem__)
+        return previous[end] / m, end
+
+    def score(self, samples):
+        """(distance, end_seconds) of the closest template match at the start of `samples`."""
+        window = samples[:int(self.search_seconds * self.sample_rate)]
+        query = self.features(window)
+        best = (math.inf, 0.0)
+        for template in self.templates:
+            distance, end = self._match(template, query)
+            if distance < best[0]:
+                best = (distance, (end + 1) * self.hop_seconds + (self.frame - self.hop) / self.sample_rate)
+        return best
+
+    def detect(self, samples):
+        """(detected, end_seconds): whether the wake word starts `samples` and where it ends."""
+        distance, end = self.score(samples)
+        return distance <= self.threshold, end
+
+
+class VoskSpotter:
+    """Wake-word spotting with vosk restricted to a grammar of just the wake word."""
+
+    def __init__(self, wake_word, model_path=None, sample_rate=SAMPLE_RATE, search_seconds=1.5):
+        try:
+            import vosk
+        except ImportError:
+            raise RuntimeError("VoskSpotter needs vosk: pip install vosk") from None
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.wake_word = wake_word.lower()
+        self.sample_rate = sample_rate
+        self.search_seconds = search_seconds
+        self._model = vosk.Model(model_path) if model_path else vosk.Model(lang='en-us')
+        self._grammar = json.dumps([self.wake_word, '[unk]'])
+
+    def detect(self, samples):
+        decoder = self._vosk.KaldiRecognizer(self._model, self.sample_rate, self._grammar)
+        decoder.SetWords(True)
+        window = samples[:int(self.search_seconds * self.sample_rate)]
+        decoder.AcceptWaveform(window.tobytes())
+        for word in json.loads(decoder.FinalResult()).get('result', []):
+            if word.get('word') == self.wake_word:
+                return True, word.get('end', 0.0)
+        return False, 0.0
+
+
+# --- Gate ---
+
+class WakeWordGate:
+    """
+    Decides which phrases reach the recognizer. check() returns (decision, audio):
+
+      'no_speech'  no sustained speech                         audio None
+      'no_wake'    speech without the wake word                audio None
+      'wake'       wake word followed by a command             audio after the wake word
+      'armed'      just the wake word; opens the follow-up window  audio None
+      'follow_up'  within `follow_window` s of a bare wake word  whole phrase
+    """
+
+    def __init__(self, vad, spotter, sample_rate=SAMPLE_RATE, follow_window=6.0, min_command_seconds=0.3,
+                 clock=time.monotonic):
+        self.vad = vad
+        self.spotter = spotter
+        self.sample_rate = sample_rate
+        self.follow_window = follow_window
+        self.min_command_seconds = min_command_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._armed_until = 0.0
+        self.counters = {'no_speech': 0, 'no_wake': 0, 'wake': 0, 'armed': 0, 'follow_up': 0}
+        self.cpu_seconds = 0.0
+
+    def check(self, audio):
+        start_cpu = time.thread_time()
+        try:
+            decision, audio = self._check(audio)
+        finally:
+            spent = time.thread_time() - start_cpu
+        with self._lock:
+            self.counters[decision] += 1
+            self.cpu_seconds += spent
+        return decision, audio
+
+    def _check(self, audio):
+        samples = pcm_samples(audio, self.sample_rate)
+        span = self.vad.speech_span(samples)
+        if span is None:
+            return 'no_speech', None
+
+        speech_start, speech_end = span
+        detected, wake_end = self.spotter.detect(samples[int(speech_start * self.sample_rate):])
+        now = self._clock()
+        if detected:
+            wake_end += speech_start
+            if speech_end - wake_end < self.min_command_seconds:
+                # Just the wake word: the command should follow in the next phrase.
+                with self._lock:
+                    self._armed_until = now + self.follow_window
+                return 'armed', None
+            return 'wake', trim_audio(audio, wake_end)
+
+        with self._lock:
+            armed = now < self._armed_until
+            if armed:
+                self._armed_until = 0.0
+        return ('follow_up', audio) if armed else ('no_wake', None)
+
+    def admit(self, audio):
+        """The audio to recognize, or None if the phrase should be skipped."""
+        return self.check(audio)[1]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['cpu_seconds'] = round(self.cpu_seconds, 3)
+        return stats
@@ -0,0 +1,142 @@
+"""
+Benchmarks for weather.py against the local stub server (no API key needed).
+
+    python bench_weather.py bulk --locations 200 --latency 0.05 --workers 16
+    python bench_weather.py coalesce --burst 100 --latency 0.2     # needs aiohttp
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import weather
+from stub_server import start_stub_server
+
+
+# =========================================================================
+# Bulk: sequential vs pooled concurrent fetches
+# =========================================================================
+
+def bench_sequential(locations):
+    """The original behaviour: one fresh requests.get (new connection) per location."""
+    for location in locations:
+        params = {'q': location, 'appid': weather.API_KEY, 'units': weather.UNITS}
+        requests.get(weather.BASE_URL, params=params).json()
+
+
+def bench_bulk(locations, workers):
+    return weather.get_weather_data_bulk(locations, max_workers=workers)
+
+
+def run(name, server, func, *args):
+    requests_before, connections_before = server.requests, server.connections
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    count = server.requests - requests_before
+    print(f"{name:<22} {elapsed:8.3f} s  {count / elapsed:9.1f} req/s  "
+          f"{server.connections - connections_before:5d} connections")
+
+
+def run_bulk(args, server):
+    locations = [f"City {i}" for i in range(args.locations)]
+
+    print(f"{args.locations} locations, {args.latency * 1000:.0f} ms simulated latency, {args.workers} workers")
+    run("sequential (no pool)", server, bench_sequential, locations)
+    run("bulk (pooled)", server, bench_bulk, locations, args.workers)
+
+    results = bench_bulk(locations[:5] + ["Nowhere"], args.workers)
+    assert [r.get("name") for r in results[:5]] == [loc.title() for loc in locations[:5]], "results out of order"
+    assert "error" in results[-1]
+
+
+# =========================================================================
+# Coalesce: a burst of duplicate requests against weather_server.py
+# =========================================================================
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_weather_server(coalesce):
+    """Runs weather_server's app on its own event loop thread; returns (base_url, stop)."""
+    from aiohttp import web
+    import weather_server
+
+    port = free_port()
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(weather_server.create_app(coalesce=coalesce))
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+def burst(url, count):
+    """Fires `count` simultaneous GETs; returns sorted latencies in ms."""
+    barrier = threading.Barrier(count)
+
+    def one(_):
+        barrier.wait()
+        start = time.perf_counter()
+        urllib.request.urlopen(url).read()
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return sorted(pool.map(one, range(count)))
+
+
+def run_coalesce(args, server):
+    # Measure coalescing on its own: with the cache on, every request after the first would be a hit anyway.
+    weather.CACHE_ENABLED = False
+    print(f"burst of {args.burst} duplicate requests, {args.latency * 1000:.0f} ms simulated upstream latency")
+
+    for coalesce in (False, True):
+        base_url, stop = start_weather_server(coalesce)
+        before = server.requests
+        latencies = burst(f"{base_url}/weather?q=London", args.burst)
+        upstream = server.requests - before
+        stop()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        label = "single-flight" if coalesce else "no coalescing"
+        print(f"{label:<15} upstream calls: {upstream:4d}   p50 {p50:8.1f} ms   p99 {p99:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Weather fetch benchmarks against a local stub upstream.")
+    parser.add_argument('scenario', nargs='?', choices=['bulk', 'coalesce'], default='bulk')
+    parser.add_argument('--locations', type=int, default=200, help="Locations for the bulk scenario.")
+    parser.add_argument('--burst', type=int, default=100, help="Duplicate requests for the coalesce scenario.")
+    parser.add_argument('--latency', type=float, default=0.05, help="Simulated upstream latency (s).")
+    parser.add_argument('--workers', type=int, default=weather.MAX_WORKERS)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency)
+    weather.BASE_URL = server.base_url
+    weather.CACHE_ENABLED = False
+    try:
+        if args.scenario == 'coalesce':
+            run_coalesce(args, server)
+        else:
+            run_bulk(args, server)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Local stand-in for the OpenWeatherMap current-weather endpoint, for testing
+and benchmarking without an API key or network access.
+
+    python stub_server.py --port 8081 --latency 0.1
+    WEATHER_BASE_URL=http://127.0.0.1:8081/data/2.5/weather python weather.py London Paris
+
+Responses are deterministic per location. Locations starting with "nowhere"
+return 404 like the real API does for unknown cities.
+"""
+import argparse
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+WEATHER_PATH = "/data/2.5/weather"
+CONDITIONS = [
+    ("Clear", "clear sky"),
+    ("Clouds", "broken clouds"),
+    ("Rain", "light rain"),
+    ("Drizzle", "light intensity drizzle"),
+    ("Thunderstorm", "thunderstorm"),
+    ("Snow", "light snow"),
+    ("Mist", "mist"),
+]
+
+
+def fake_weather(location, units="metric"):
+    """Builds an OpenWeatherMap-shaped response that is stable for a given location."""
+    seed = zlib.crc32(location.lower().encode("utf-8"))
+    condition, description = CONDITIONS[seed % len(CONDITIONS)]
+    temp_c = (seed % 400) / 10 - 5
+    temp = temp_c * 9 / 5 + 32 if units == "imperial" else temp_c
+    return {
+        "weather": [{"id": 800, "main": condition, "description": description, "icon": "01d"}],
+        "main": {"temp": round(temp, 2), "feels_like": round(temp - 1.5, 2), "humidity": 30 + seed % 70},
+        "wind": {"speed": (seed % 150) / 10},
+        "sys": {"country": "XX"},
+        "name": location.split(",")[0].strip().title(),
+        "cod": 200,
+    }
+
+
+class StubWeatherServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0):
+        super().__init__(address, StubWeatherHandler)
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.counter_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{WEATHER_PATH}"
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def setup(self):
+        super().setup()
+        with self.server.counter_lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.counter_lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        location = query.get("q", [""])[0]
+
+        if url.path != WEATHER_PATH:
+            status, body = 404, {"cod": "404", "message": "Not Found"}
+        elif not location:
+            status, body = 400, {"cod": "400", "message": "Nothing to geocode"}
+        elif location.lower().startswith("nowhere"):
+            status, body = 404, {"cod": "404", "message": "city not found"}
+        else:
+            status, body = 200, fake_weather(location, query.get("units", ["metric"])[0])
+
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=0.0, host="127.0.0.1"):
+    """Starts the stub on a background thread and returns the server (see .base_url)."""
+    server = StubWeatherServer((host, port), latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenWeatherMap stub server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of simulated upstream latency per request.")
+    args = parser.parse_args()
+
+    server = StubWeatherServer((args.host, args.port), args.latency)
+    print(f"Stub weather API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
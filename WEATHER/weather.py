@@ -2,16 +2,47 @@ import requests
 import time
 import sys
 import os
+import argparse
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from weather_cache import WeatherCache
+from weather_client import WeatherClient
+from weather_history import WeatherHistory
+from weather_model import ObservationTable, WeatherObservation, loads
+from weather_render import AnimationRenderer, should_animate
 
 # =========================================================================
 # Configuration
 # =========================================================================
 
 # from OpenWeatherMap (https://openweathermap.org).
-API_KEY = "your api key"
-BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
+API_KEY = os.environ.get("WEATHER_API_KEY", "your api key")
+BASE_URL = os.environ.get("WEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5/weather")
 UNITS = "metric"  # Use "imperial" for Fahrenheit or "metric" for Celsius
 
+# Bulk mode: default number of concurrent requests. They share one keep-alive connection
+# pool, which grows to the largest concurrency asked for (see reserve_connections).
+MAX_WORKERS = 8
+
+# Upstream client: timeouts (seconds) and retries of transient failures (429/5xx, connection errors).
+CONNECT_TIMEOUT = float(os.environ.get("WEATHER_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("WEATHER_READ_TIMEOUT", "10"))
+MAX_RETRIES = int(os.environ.get("WEATHER_MAX_RETRIES", "3"))
+
+# Response cache: seconds a result stays fresh, how long errors/unknown locations are
+# remembered, and how long past expiry a result may still be served while refreshing.
+CACHE_ENABLED = os.environ.get("WEATHER_CACHE", "1") != "0"
+CACHE_PATH = os.environ.get("WEATHER_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "weather_cache.sqlite3"))
+CACHE_TTL = float(os.environ.get("WEATHER_CACHE_TTL", "600"))
+CACHE_NEGATIVE_TTL = float(os.environ.get("WEATHER_CACHE_NEGATIVE_TTL", "60"))
+CACHE_STALE_TTL = float(os.environ.get("WEATHER_CACHE_STALE_TTL", "3600"))
+
+# Observation history store (see weather_history.py); unset to keep nothing.
+HISTORY_DIR = os.environ.get("WEATHER_HISTORY_DIR")
+
 # =========================================================================
 # ASCII Art Definitions for Console Animation
 # =========================================================================
@@ -48,7 +79,112 @@ WEATHER_ICONS = {
 # Core Functions
 # =========================================================================
 
+_session = None
+_session_lock = threading.Lock()
+_pool_size = MAX_WORKERS
+
+
+def _mount_adapter(session):
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def get_session():
+    """Returns the shared keep-alive HTTP session, so repeat requests skip TCP/TLS setup."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _mount_adapter(_session)
+        return _session
+
+
+def reserve_connections(size):
+    """
+    Grows the shared session's connection pool to at least `size`. Call it with
+    the number of threads that will make requests at once; a smaller pool
+    discards the extra connections after each request instead of keeping them alive.
+    """
+    global _pool_size
+    with _session_lock:
+        if size <= _pool_size:
+            return
+        _pool_size = size
+        if _session is not None:
+            _mount_adapter(_session)
+
+
+_client = None
+
+
+def get_client():
+    """Returns the shared resilient client (timeouts, retries, circuit breaker) over the pooled session."""
+    global _client
+    session = get_session()
+    with _session_lock:
+        if _client is None:
+            _client = WeatherClient(session, CONNECT_TIMEOUT, READ_TIMEOUT, MAX_RETRIES)
+        return _client
+
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` calls per second, with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_cache = None
+
+
+def get_cache():
+    """Returns the shared weather cache, opening the on-disk store on first use."""
+    global _cache
+    with _session_lock:
+        if _cache is None:
+            _cache = WeatherCache(CACHE_PATH, CACHE_TTL, CACHE_NEGATIVE_TTL, CACHE_STALE_TTL)
+        return _cache
+
+
 def get_weather_data(location):
+    """Returns current weather data for the specified location, from the cache when possible."""
+    if not CACHE_ENABLED:
+        return fetch_weather_data(location)
+    return get_cache().get_or_fetch(location, UNITS, fetch_weather_data)
+
+
+def lookup_weather_data(location):
+    """
+    Like get_weather_data, but returns (data, fresh). fresh is False for cached
+    responses and stale fallbacks, which are not new observations.
+    """
+    if CACHE_ENABLED:
+        data, source = get_cache().lookup(location, UNITS, fetch_weather_data)
+        if source != "miss":
+            return data, False
+    else:
+        data = fetch_weather_data(location)
+    return data, not data.get("stale")
+
+
+def fetch_weather_data(location):
     """Fetches current weather data for the specified location."""
 
     # Construct the full API URL
@@ -60,52 +196,123 @@ def get_weather_data(location):
 
     try:
         # Make the API request
-        response = requests.get(BASE_URL, params=params)
+        response = get_client().get(BASE_URL, params=params)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-        data = response.json()
+        data = loads(response.content)
 
         # Check if the city was found
         if data.get("cod") == "404":
-            return {"error": f"Location '{location}' not found."}
+            return request_error(location, 404)
 
         return data
 
     except requests.exceptions.RequestException as e:
-        # Handle connection errors or other request-related issues
-        return {"error": f"API Request Error: {e}"}
+        # Upstream down or overloaded: fall back to the last good data we have, however old
+        fallback = get_fallback_data(location, e)
+        if fallback is not None:
+            return fallback
+        response = getattr(e, "response", None)
+        return request_error(location, response.status_code if response is not None else None, e)
     except Exception as e:
         # Handle parsing errors or unexpected issues
-        return {"error": f"An unexpected error occurred: {e}"}
+        return {"error": f"Could not read the weather for '{location}' ({type(e).__name__})."}
+
+
+def request_error(location, status=None, error=None):
+    """
+    The error result for a failed upstream request: {"error", "status"}, where
+    status is the upstream HTTP status (None if there was no response).
+    The message is built from the status and location only: the text of a
+    requests exception contains the request URL, API key included.
+    """
+    if status == 404:
+        message = f"Location '{location}' not found."
+    elif status is not None:
+        message = f"Weather service returned HTTP {status} for '{location}'."
+    else:
+        reason = type(error).__name__ if error is not None else "no response"
+        message = f"Could not reach the weather service for '{location}' ({reason})."
+    return {"error": message, "status": status}
 
 
-def display_weather_animation(condition_main):
-    """Simulates a short console animation based on the main weather condition."""
+def get_fallback_data(location, error):
+    """Returns cached data marked "stale" when the upstream failed (not for 4xx answers like 404)."""
+    response = getattr(error, "response", None)
+    if response is not None and 400 <= response.status_code < 500 and response.status_code != 429:
+        return None
+    if not CACHE_ENABLED:
+        return None
+    cached = get_cache().peek(location, UNITS)
+    if cached is None or "error" in cached:
+        return None
+    return dict(cached, stale=True)
 
-    # Choose frames based on condition
+
+def iter_weather_data_bulk(locations, max_workers=MAX_WORKERS, rate_limit=None, lookup=get_weather_data):
+    """
+    Fetches weather for many locations concurrently over the shared session.
+    `rate_limit` caps requests per second, without an initial burst. Results are
+    yielded in input order. `lookup` fetches one location (e.g. lookup_weather_data
+    to also get freshness).
+    """
+    reserve_connections(max_workers)
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+
+    def fetch(location):
+        if limiter is not None:
+            limiter.acquire()
+        return lookup(location)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(fetch, locations)
+
+
+def get_weather_data_bulk(locations, max_workers=MAX_WORKERS, rate_limit=None, lookup=get_weather_data):
+    """Like iter_weather_data_bulk, but returns the results as a list."""
+    return list(iter_weather_data_bulk(locations, max_workers, rate_limit, lookup))
+
+
+def get_weather_table(locations, max_workers=MAX_WORKERS, rate_limit=None):
+    """Fetches many locations into a columnar ObservationTable, dropping each response dict once converted."""
+    locations = list(locations)
+    return ObservationTable.from_responses(locations, iter_weather_data_bulk(locations, max_workers, rate_limit))
+
+
+def read_locations(path):
+    """Reads one location per line from a file ('-' for stdin), skipping blanks and # comments."""
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        return [line.strip() for line in stream if line.strip() and not line.lstrip().startswith('#')]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def animation_panel(condition_main, title=None):
+    """Returns the (title, frames) panel for a weather condition; static conditions get one frame."""
     if condition_main in ["Rain", "Drizzle", "Thunderstorm", "Snow"]:
         frames = RAIN_FRAMES
-        icon_name = "Rain/Snow"
     elif condition_main == "Clear":
         frames = SUN_FRAMES
-        icon_name = "Sun"
     else:
-        # For clouds, mist, etc., just print the icon once
-        print(f"\n--- {WEATHER_ICONS.get(condition_main, condition_main)} Animation ---")
-        return
+        frames = [WEATHER_ICONS.get(condition_main, condition_main)]
+    return (title or condition_main, frames)
+
 
-    print(f"\n--- Simulating {icon_name} Animation ({condition_main}) ---")
+def start_weather_animation(results):
+    """Starts a side-by-side animation for the successful results on a background thread."""
+    panels = [
+        animation_panel(observation.condition, observation.location)
+        for observation in (WeatherObservation.from_dict(data) for data in results if "error" not in data)
+    ]
+    if not panels:
+        return None
+    return AnimationRenderer(panels).start()
 
-    # Run the "animation" loop (5 cycles)
-    for _ in range(5):
-        for frame in frames:
-            # Clear the previous lines and print the new frame
-            # (Note: Clearing the console fully is complex and OS-dependent,
-            # so we just overwrite the frame line using '\r' and time.sleep)
-            print(f"\r{frame}", end='', flush=True)
-            time.sleep(0.15)
 
-    # Move to a new line after the animation is finished
-    print("\n-------------------------------------------")
+def display_weather_animation(condition_main):
+    """Plays a short console animation for the main weather condition (blocks until done)."""
+    AnimationRenderer([animation_panel(condition_main)]).run()
 
 
 def display_weather_info(data):
@@ -116,33 +323,73 @@ def display_weather_info(data):
         print(data["error"])
         return
 
-    main = data.get("main", {})
-    weather = data.get("weather", [{}])[0]
-    location_name = data.get("name", "Unknown Location")
-    country = data.get("sys", {}).get("country", "")
+    display_observation(WeatherObservation.from_dict(data))
+    if data.get("stale"):
+        print("(Weather service unavailable: showing the last cached report.)")
 
-    # Extract required information
-    temperature = main.get("temp")
-    humidity = main.get("humidity")
-    weather_condition_main = weather.get("main", "N/A")
-    weather_condition_desc = weather.get("description", "N/A").capitalize()
 
+def display_observation(observation):
+    """Prints a weather report for one observation."""
     unit_char = "C" if UNITS == "metric" else "F"
+    temperature = "N/A" if observation.temperature is None else f"{observation.temperature:.1f}°{unit_char}"
+    humidity = "N/A" if observation.humidity is None else f"{observation.humidity}%"
 
-    # 1. Run the Animation
-    display_weather_animation(weather_condition_main)
-
-    # 2. Display the Data
-    print(f"\n[ 🌍 Weather Report for {location_name}, {country} ]")
+    # Display the Data (any animation runs separately, after the report is on screen)
+    print(f"\n[ 🌍 Weather Report for {observation.location}, {observation.country} ]")
     print(f"=================================================")
-    print(f"🌡️ Temperature: {temperature:.1f}°{unit_char}")
-    print(f"💧 Humidity:    {humidity}%")
-    print(f"☀️ Conditions:  {weather_condition_desc} ({weather_condition_main})")
+    print(f"🌡️ Temperature: {temperature}")
+    print(f"💧 Humidity:    {humidity}")
+    print(f"☀️ Conditions:  {observation.description.capitalize()} ({observation.condition})")
     print(f"=================================================")
 
 
+def finish_animation(renderer):
+    """Lets a running animation play out; Ctrl+C cuts it short."""
+    if renderer is None:
+        return
+    try:
+        renderer.wait()
+    except KeyboardInterrupt:
+        renderer.stop()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Console weather app (OpenWeatherMap).")
+    parser.add_argument('locations', nargs='*', help="City names or ZIP codes. Omit to be prompted.")
+    parser.add_argument('--file', '-f', help="File with one location per line ('-' for stdin); enables bulk mode.")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="Concurrent requests in bulk mode.")
+    parser.add_argument('--rate', type=float, help="Maximum requests per second in bulk mode.")
+    parser.add_argument('--no-animate', action='store_true', help="Skip the console weather animation.")
+    parser.add_argument('--no-cache', action='store_true', help="Always query the API, bypassing the local cache.")
+    parser.add_argument('--daemon', metavar='CONFIG', help="Poll the locations in a JSON config and emit changes as NDJSON.")
+    parser.add_argument('--output', '-o', help="NDJSON output file for --daemon (default: stdout).")
+    parser.add_argument('--history', default=HISTORY_DIR, help="Record observations in this history store directory.")
+    parser.add_argument('--stats', action='store_true', help="Print upstream request/latency counters to stderr on exit.")
+    return parser.parse_args(argv)
+
+
 def main():
     """Main function to run the weather application."""
+    args = parse_args()
+    try:
+        run(args)
+    finally:
+        if args.stats and _client is not None:
+            print(json.dumps(_client.stats.snapshot(), indent=2), file=sys.stderr)
+
+
+def run(args):
+    global CACHE_ENABLED
+    if args.no_cache:
+        CACHE_ENABLED = False
+
+    history = WeatherHistory(args.history) if args.history else None
+
+    if args.daemon:
+        from weather_daemon import run_daemon
+        run_daemon(args.daemon, args.output, history)
+        return
+
     print("--- Python Console Weather App ---")
     print("Fetching weather data using OpenWeatherMap.")
 
@@ -151,8 +398,30 @@ def main():
             "\nCRITICAL ERROR: Please replace 'YOUR_API_KEY_HERE' in the script with your actual OpenWeatherMap API key.")
         return
 
+    locations = list(args.locations)
+    if args.file:
+        locations.extend(read_locations(args.file))
+
+    # Batch (--file) runs never animate; a few locations on the command line animate side by side.
+    animate = should_animate(not args.no_animate and not args.file)
+
+    if args.file or len(locations) > 1:
+        print(f"\nFetching data for {len(locations)} locations...")
+        lookups = get_weather_data_bulk(locations, args.workers, args.rate, lookup=lookup_weather_data)
+        results = [weather_data for weather_data, _ in lookups]
+        for location, (weather_data, fresh) in zip(locations, lookups):
+            display_weather_info(weather_data)
+            # Cached and stale responses are old observations; only record new ones.
+            if history is not None and fresh:
+                history.append_weather(location, weather_data)
+        if history is not None:
+            history.close()
+        if animate:
+            finish_animation(start_weather_animation(results))
+        return
+
     # Get user input for location
-    location = input("\nEnter city name or ZIP code: ").strip()
+    location = locations[0] if locations else input("\nEnter city name or ZIP code: ").strip()
     if not location:
         print("Location cannot be empty. Exiting.")
         return
@@ -160,8 +429,14 @@ def main():
     print(f"\nFetching data for {location}...")
 
     # Fetch and display
-    weather_data = get_weather_data(location)
+    weather_data, fresh = lookup_weather_data(location)
     display_weather_info(weather_data)
+    if history is not None:
+        if fresh:
+            history.append_weather(location, weather_data)
+        history.close()
+    if animate:
+        finish_animation(start_weather_animation([weather_data]))
 
 
 if __name__ == "__main__":
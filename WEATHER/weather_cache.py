@@ -0,0 +1,150 @@
+"""
+Two-level TTL cache for weather lookups: an in-memory LRU in front of a
+SQLite file, so results survive between runs of the CLI.
+
+Fresh entries are returned directly. Entries past their TTL but inside the
+stale window are returned immediately while a background thread refreshes
+them. Error results (including unknown locations) use a shorter TTL and are
+never served stale.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from weather_model import loads
+
+
+def normalize_key(location, units):
+    """'  New  York ' and 'new york' share an entry; units are part of the key."""
+    return f"{' '.join(location.lower().split())}|{units}"
+
+
+class WeatherCache:
+
+    def __init__(self, path=None, ttl=600.0, negative_ttl=60.0, stale_ttl=3600.0, max_memory=256):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_memory = max_memory
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS weather_cache ("
+                "key TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    # --- Storage ---
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT data, expires_at FROM weather_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = (loads(row[0]), row[1])
+            self._remember(key, entry)
+            return entry
+
+    def store(self, key, data):
+        if data.get("stale"):
+            # A fallback copy served while the upstream is down; keep the original's expiry.
+            return
+        ttl = self.negative_ttl if "error" in data else self.ttl
+        entry = (data, time.time() + ttl)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO weather_cache (key, data, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(data), entry[1]),
+                )
+                self._db.commit()
+
+    def put(self, location, units, data):
+        """Stores freshly fetched data for a location (e.g. from the polling daemon)."""
+        self.store(normalize_key(location, units), data)
+
+    def peek(self, location, units):
+        """Returns the cached data for a location regardless of age, or None."""
+        entry = self._load(normalize_key(location, units))
+        return entry[0] if entry is not None else None
+
+    # --- Lookup ---
+
+    def get_or_fetch(self, location, units, fetch):
+        """Returns cached data for (location, units), calling fetch(location) on a miss."""
+        return self.lookup(location, units, fetch)[0]
+
+    def lookup(self, location, units, fetch):
+        """
+        Like get_or_fetch, but returns (data, source) where source is "hit",
+        "stale" (expired copy served while refreshing) or "miss" (fetched now).
+        """
+        key = normalize_key(location, units)
+        entry = self._load(key)
+        now = time.time()
+
+        if entry is not None:
+            data, expires_at = entry
+            if now < expires_at:
+                self.hits += 1
+                return data, "hit"
+            if "error" not in data and now < expires_at + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh_in_background(key, location, fetch)
+                return data, "stale"
+
+        self.misses += 1
+        data = fetch(location)
+        self.store(key, data)
+        return data, "miss"
+
+    def _refresh_in_background(self, key, location, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                data = fetch(location)
+                # A failed refresh keeps serving the stale copy instead of caching the error.
+                if "error" not in data:
+                    self.store(key, data)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        # Not a daemon thread: a one-shot CLI run still finishes writing the refreshed entry.
+        threading.Thread(target=refresh, name=f"weather-refresh-{location}").start()
+
+    def stats(self):
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses,
+                "memory_entries": len(self._memory)}
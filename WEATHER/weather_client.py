@@ -0,0 +1,185 @@
+"""
+Resilient HTTP client for the weather upstream.
+
+Wraps a requests.Session with:
+  * connect/read timeouts on every request, so a stalled upstream cannot hang the process;
+  * retries of 429/5xx responses and connection errors with full-jitter exponential
+    backoff, honouring Retry-After;
+  * a circuit breaker that fails fast after repeated failures, letting callers serve
+    cached data until a trial request succeeds again;
+  * counters and a latency histogram for observing tail behaviour.
+"""
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without contacting the upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failed calls;
+    open -> half-open after `reset_timeout` seconds, letting one trial call through;
+    half-open -> closed on success, back to open on failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and self._clock() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                return True
+            return self.state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = self._clock()
+
+
+class ClientStats:
+    """Thread-safe request counters plus a latency histogram and recent-sample percentiles."""
+
+    def __init__(self, recent=2048):
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "attempts": 0, "successes": 0, "failures": 0,
+                         "retries": 0, "timeouts": 0, "circuit_rejections": 0}
+        self.statuses = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._recent = deque(maxlen=recent)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def observe(self, latency_s, status=None):
+        latency_ms = latency_s * 1000
+        with self._lock:
+            self.counters["attempts"] += 1
+            if status is not None:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+            index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= bound), len(LATENCY_BUCKETS_MS))
+            self.buckets[index] += 1
+            self._recent.append(latency_ms)
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self._recent)
+            histogram = {f"le_{bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)}
+            histogram["le_inf"] = self.buckets[-1]
+            snapshot = dict(self.counters)
+            snapshot["statuses"] = {str(status): count for status, count in self.statuses.items()}
+            snapshot["latency_histogram"] = histogram
+
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))], 2) if recent else None
+
+        snapshot["latency_ms"] = {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)}
+        return snapshot
+
+
+class WeatherClient:
+
+    def __init__(self, session, connect_timeout=3.05, read_timeout=10.0, max_retries=3,
+                 backoff_base=0.5, backoff_cap=8.0, max_retry_after=30.0, breaker=None, sleep=time.sleep):
+        self.session = session
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = ClientStats()
+        self._sleep = sleep
+
+    def _backoff(self, attempt):
+        """Full jitter: uniform in [0, min(cap, base * 2^attempt)]."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _retry_after(self, response):
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return max(0.0, min(delay, self.max_retry_after))
+
+    def get(self, url, params=None):
+        """
+        GETs `url`, retrying transient failures. Returns the final response (callers still
+        check its status); raises CircuitOpenError, the last connection error, or any other
+        request error (not retried).
+        """
+        self.stats.incr("requests")
+        if not self.breaker.allow():
+            self.stats.incr("circuit_rejections")
+            raise CircuitOpenError("Weather service unavailable; circuit breaker is open.")
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.stats.observe(time.perf_counter() - start)
+                if isinstance(e, requests.exceptions.Timeout):
+                    self.stats.incr("timeouts")
+                if last_attempt:
+                    self.stats.incr("failures")
+                    self.breaker.record_failure()
+                    raise
+                self.stats.incr("retries")
+                self._sleep(self._backoff(attempt))
+                continue
+            except Exception:
+                # Anything else (ChunkedEncodingError, TooManyRedirects, ...) is not retried, but it
+                # still counts as a failure so a half-open trial always resolves the breaker.
+                self.stats.observe(time.perf_counter() - start)
+                self.stats.incr("failures")
+                self.breaker.record_failure()
+                raise
+
+            self.stats.observe(time.perf_counter() - start, response.status_code)
+            if response.status_code in RETRY_STATUSES:
+                if last_attempt:
+                    self.stats.incr("failures")
+                    self.breaker.record_failure()
+                    return response
+                self.stats.incr("retries")
+                delay = self._retry_after(response)
+                self._sleep(self._backoff(attempt) if delay is None else delay)
+                continue
+
+            # Anything else (including 404 for unknown cities) means the upstream is healthy.
+            self.stats.incr("successes")
+            self.breaker.record_success()
+            return response
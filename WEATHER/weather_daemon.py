@@ -0,0 +1,190 @@
+"""
+Resident polling mode: keeps one process (and one connection pool) alive and
+polls a set of locations, each on its own interval.
+
+Jobs live in a heap ordered by next due time. Every reschedule adds random
+jitter so locations sharing an interval drift apart instead of firing in
+bursts. Only fields that changed since the previous poll are written, as one
+JSON object per line (NDJSON).
+
+    python weather_daemon.py locations.json --output changes.ndjson
+
+locations.json:
+    {"interval": 600, "jitter": 0.1,
+     "locations": ["London", {"location": "Paris", "interval": 300}]}
+"""
+import argparse
+import datetime
+import heapq
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import weather
+from weather_history import WeatherHistory
+from weather_model import WeatherObservation
+
+
+class PollJob:
+    __slots__ = ("location", "interval")
+
+    def __init__(self, location, interval):
+        interval = float(interval)
+        if not interval > 0:
+            raise ValueError(f"Polling interval for '{location}' must be positive, got {interval}.")
+        self.location = location
+        self.interval = interval
+
+
+def load_config(path):
+    """Reads the daemon config: {"interval", "jitter", "locations": [name | {"location", "interval"}]}."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    default_interval = config.get("interval", 600)
+    jobs = []
+    for item in config.get("locations", []):
+        if isinstance(item, str):
+            jobs.append(PollJob(item, default_interval))
+        else:
+            jobs.append(PollJob(item["location"], item.get("interval", default_interval)))
+    if not jobs:
+        raise ValueError("The config must list at least one location.")
+    jitter = float(config.get("jitter", 0.1))
+    # At 1 or more a jittered interval can reach zero or below and the scheduler would spin.
+    if not 0 <= jitter < 1:
+        raise ValueError(f"Jitter must be at least 0 and below 1, got {jitter}.")
+    return jobs, jitter
+
+
+def extract_fields(data):
+    """The fields compared between polls."""
+    observation = WeatherObservation.from_dict(data)
+    return {
+        "temperature": observation.temperature,
+        "humidity": observation.humidity,
+        "condition": observation.condition,
+    }
+
+
+class WeatherDaemon:
+
+    def __init__(self, jobs, output=sys.stdout, jitter=0.1, max_workers=weather.MAX_WORKERS, clock=time.time,
+                 history=None):
+        self.jobs = jobs
+        self.history = history
+        self.output = output
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self._clock = clock
+        self._heap = []
+        self._sequence = itertools.count()
+        self._last = {}
+        self._emit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._inflight = set()
+        self.skipped = 0
+
+    # --- Scheduling ---
+
+    def _jittered(self, interval):
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _schedule(self, job, due):
+        heapq.heappush(self._heap, (due, next(self._sequence), job))
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        now = self._clock()
+        for job in self.jobs:
+            # Spread the first round over a fraction of each interval instead of firing all at once.
+            self._schedule(job, now + random.uniform(0, job.interval * self.jitter))
+
+        weather.reserve_connections(self.max_workers)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while not self._stop.is_set():
+                due, _, job = self._heap[0]
+                delay = due - self._clock()
+                if delay > 0:
+                    self._stop.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                # Reschedule from the due time, not completion, so slow fetches don't cause drift.
+                self._schedule(job, due + self._jittered(job.interval))
+                # A poll slower than its interval is not overlapped: two polls of one location
+                # could finish out of order and emit changes backwards.
+                with self._emit_lock:
+                    if job in self._inflight:
+                        self.skipped += 1
+                        continue
+                    self._inflight.add(job)
+                pool.submit(self._poll_job, job)
+
+    def _poll_job(self, job):
+        try:
+            self.poll(job)
+        finally:
+            with self._emit_lock:
+                self._inflight.discard(job)
+
+    # --- Polling & Change Detection ---
+
+    def poll(self, job):
+        data = weather.fetch_weather_data(job.location)
+        if data.get("stale"):
+            # Upstream unavailable and the cached fallback was served: nothing new to report.
+            return
+        if weather.CACHE_ENABLED and "error" not in data:
+            weather.get_cache().put(job.location, weather.UNITS, data)
+        if self.history is not None and "error" not in data:
+            # Every poll is kept, not just changes, so downsampled history has no gaps.
+            self.history.append_weather(job.location, data)
+            self.history.flush()
+        self.process(job.location, data)
+
+    def process(self, location, data):
+        """Emits the fields of `data` that differ from the previous poll of `location`."""
+        record = {"error": data["error"]} if "error" in data else extract_fields(data)
+        with self._emit_lock:
+            previous = self._last.get(location, {})
+            changes = {key: value for key, value in record.items() if previous.get(key, object()) != value}
+            self._last[location] = record
+            if not changes:
+                return None
+
+            event = {"time": datetime.datetime.fromtimestamp(self._clock(), datetime.timezone.utc).isoformat(),
+                     "location": location, **changes}
+            self.output.write(json.dumps(event) + "\n")
+            self.output.flush()
+        return event
+
+
+def run_daemon(config_path, output_path=None, history=None):
+    jobs, jitter = load_config(config_path)
+    output = open(output_path, "a", encoding="utf-8") if output_path else sys.stdout
+    daemon = WeatherDaemon(jobs, output, jitter, history=history)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll weather for configured locations and emit changes as NDJSON.")
+    parser.add_argument("config", help="JSON config listing locations and intervals.")
+    parser.add_argument("--output", "-o", help="Append NDJSON to this file instead of stdout.")
+    parser.add_argument("--history", default=weather.HISTORY_DIR, help="Also record every poll in this history store.")
+    args = parser.parse_args()
+    run_daemon(args.config, args.output, WeatherHistory(args.history) if args.history else None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""
+Append-only history of weather observations in a compact columnar format.
+
+A store is a directory of segments. Each segment keeps one binary file per
+column, written with the `array` module:
+
+    ts.bin    float64   observation time (unix seconds)
+    loc.bin   uint32    location id      -> dictionary.json "locations"
+    temp.bin  float32   temperature (NaN when missing)
+    hum.bin   uint8     humidity % (255 when missing)
+    cond.bin  uint16    condition id     -> dictionary.json "conditions"
+
+A row costs 19 bytes instead of the ~500-byte JSON response. Reads
+memory-map the column files, so scans touch only the pages they need.
+
+Rows keep the upstream observation time. Each location's rows are strictly
+increasing in time (a reading no newer than the location's last one, e.g. a
+cached or stale response, is skipped), but locations interleave, so the
+store as a whole is only roughly time-ordered. index.json in each segment
+records its time range and whether it happens to be sorted: range queries
+skip segments outside the range and bisect the sorted ones.
+
+Several processes may write to one store (the daemon and the CLI both
+default to WEATHER_HISTORY_DIR). Writers buffer rows in memory and flush
+under an exclusive lock on store.lock: each flush first reloads the
+dictionary and the segment layout from disk, so ids and row offsets are
+never assigned from stale per-process state.
+
+    python weather_history.py ~/.weather_history --latest
+    python weather_history.py ~/.weather_history --hourly London --since 24
+"""
+import argparse
+import bisect
+import datetime
+import json
+import math
+import mmap
+import os
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+from weather_model import WeatherObservation
+
+COLUMNS = (
+    ("ts", "d"),
+    ("loc", "I"),
+    ("temp", "f"),
+    ("hum", "B"),
+    ("cond", "H"),
+)
+MISSING_HUMIDITY = 255
+ITEM_SIZES = {name: array(typecode).itemsize for name, typecode in COLUMNS}
+
+
+class Observation:
+    __slots__ = ("location", "timestamp", "temperature", "humidity", "condition")
+
+    def __init__(self, location, timestamp, temperature, humidity, condition):
+        self.location = location
+        self.timestamp = timestamp
+        self.temperature = temperature
+        self.humidity = humidity
+        self.condition = condition
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Observation({self.location!r}, {self.timestamp}, {self.temperature}, {self.humidity}, {self.condition!r})"
+
+
+def _segment_rows(directory):
+    """Complete rows in a segment. Columns are appended together, but a crash may leave a partial row."""
+    rows = []
+    for name, _ in COLUMNS:
+        path = os.path.join(directory, f"{name}.bin")
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        rows.append(size // ITEM_SIZES[name])
+    return min(rows)
+
+
+@contextmanager
+def _exclusive(path):
+    """Holds an exclusive lock on `path` (created if missing) across processes."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _time_index(ts, rows):
+    """{'rows', 'min_ts', 'max_ts', 'sorted'} for the first `rows` timestamps."""
+    if not rows:
+        return {"rows": 0, "min_ts": None, "max_ts": None, "sorted": True}
+    in_order = all(ts[i] <= ts[i + 1] for i in range(rows - 1))
+    if in_order:
+        return {"rows": rows, "min_ts": ts[0], "max_ts": ts[rows - 1], "sorted": True}
+    values = ts[:rows]
+    return {"rows": rows, "min_ts": min(values), "max_ts": max(values), "sorted": False}
+
+
+class _Segment:
+    """Read-only, memory-mapped view of one segment's columns, cut to whole rows."""
+
+    def __init__(self, directory):
+        self._maps = []
+        self._views = []
+        self.columns = {}
+        self.rows = _segment_rows(directory)
+        for name, typecode in COLUMNS:
+            if self.rows == 0:
+                self.columns[name] = array(typecode)
+                continue
+            with open(os.path.join(directory, f"{name}.bin"), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            base = memoryview(mapped)
+            self._maps.append(mapped)
+            self._views.append(base)
+            # Slice off any torn trailing bytes first: cast() needs a whole number of items.
+            self.columns[name] = base[:self.rows * ITEM_SIZES[name]].cast(typecode)
+        self.index = self._load_index(directory)
+
+    def _load_index(self, directory):
+        try:
+            with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("rows") == self.rows:
+                return index
+        except (OSError, ValueError):
+            pass
+        # Missing or behind the data (older store, or a crash before the index was written).
+        return _time_index(self.columns["ts"], self.rows)
+
+    def overlaps(self, start, end):
+        index = self.index
+        if not self.rows:
+            return False
+        return (start is None or index["max_ts"] >= start) and (end is None or index["min_ts"] < end)
+
+    def close(self):
+        for column in self.columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        for view in self._views:
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+
+
+class WeatherHistory:
+
+    def __init__(self, directory, segment_rows=65536, buffer_rows=256):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.buffer_rows = buffer_rows
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._dictionary_path = os.path.join(directory, "dictionary.json")
+        self._lock_path = os.path.join(directory, "store.lock")
+
+        self.locations = []
+        self.conditions = []
+        self._location_ids = {}
+        self._condition_ids = {}
+        self._pending = []   # (location, timestamp, temperature, humidity, condition) not yet on disk
+        self._active = None
+        self._active_rows = 0
+        self._active_index = _time_index((), 0)
+        self._stored_ts = {}   # location -> newest timestamp on disk, as of the last sync
+        self.flush()
+        self._stored_ts = {name: obs.timestamp for name, obs in self.latest().items()}
+        self._last_ts = dict(self._stored_ts)   # ... including buffered rows
+
+    # --- Layout ---
+
+    def _segment_dirs(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.startswith("seg-"))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _new_segment_dir(self, number):
+        path = os.path.join(self.directory, f"seg-{number:06d}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _repair_active(self):
+        """Truncates a torn trailing row off the active segment so new rows stay aligned."""
+        rows = _segment_rows(self._active)
+        for name, _ in COLUMNS:
+            path = os.path.join(self._active, f"{name}.bin")
+            if os.path.exists(path) and os.path.getsize(path) != rows * ITEM_SIZES[name]:
+                with open(path, "r+b") as f:
+                    f.truncate(rows * ITEM_SIZES[name])
+        return rows
+
+    def _sync_locked(self):
+        """
+        Reloads the dictionary and the active segment from disk (store lock held).
+        Rows other writers added since the last sync update _stored_ts.
+        """
+        if os.path.exists(self._dictionary_path):
+            with open(self._dictionary_path, encoding="utf-8") as f:
+                dictionary = json.load(f)
+            self.locations = dictionary["locations"]
+            self.conditions = dictionary["conditions"]
+            self._location_ids = {name: i for i, name in enumerate(self.locations)}
+            self._condition_ids = {name: i for i, name in enumerate(self.conditions)}
+
+        segments = self._segment_dirs()
+        known, known_rows = self._active, self._active_rows
+        self._active = segments[-1] if segments else self._new_segment_dir(0)
+        # Under the lock every finished write is whole, so a torn row can only be left by a crash.
+        rows = self._repair_active()
+        if known == self._active and rows == known_rows:
+            return
+        if known is not None:
+            for directory in segments:
+                if directory < known:
+                    continue
+                segment = _Segment(directory)
+                try:
+                    ts, loc = segment.columns["ts"], segment.columns["loc"]
+                    for i in range(known_rows if directory == known else 0, segment.rows):
+                        name = self.locations[loc[i]]
+                        self._stored_ts[name] = max(ts[i], self._stored_ts.get(name, -math.inf))
+                finally:
+                    segment.close()
+        segment = _Segment(self._active)
+        self._active_rows = segment.rows
+        self._active_index = dict(segment.index)
+        segment.close()
+
+    def _encode(self, value, ids, names):
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(names)
+            names.append(value)
+        return code
+
+    # --- Writing ---
+
+    def append(self, location, timestamp, temperature, humidity, condition):
+        """
+        Buffers one observation and returns True. An observation no newer than
+        the last one recorded for its location (a repeated cached or stale
+        reading) is skipped and returns False. A buffered row is also dropped
+        at flush if another writer stored a reading at least as new meanwhile.
+        """
+        with self._lock:
+            timestamp = float(timestamp)
+            if timestamp <= self._last_ts.get(location, -math.inf):
+                return False
+            self._last_ts[location] = timestamp
+            self._pending.append((location, timestamp, temperature, humidity, condition or "N/A"))
+            if len(self._pending) >= self.buffer_rows:
+                self._flush_locked()
+            return True
+
+    def append_weather(self, location, data, timestamp=None):
+        """Records an OpenWeatherMap response; error results are skipped. Returns True if a row was added."""
+        if "error" in data:
+            return False
+        observation = WeatherObservation.from_dict(data)
+        if timestamp is None:
+            timestamp = observation.timestamp or time.time()
+        return self.append(location, timestamp, observation.temperature, observation.humidity,
+                           observation.condition)
+
+    def flush(self):
+        """Writes buffered rows and picks up what other writers stored since the last flush."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        with _exclusive(self._lock_path):
+            self._sync_locked()
+            self._write_locked()
+
+    def _write_locked(self):
+        buffer = {name: array(typecode) for name, typecode in COLUMNS}
+        dictionary_size = (len(self.locations), len(self.conditions))
+        for location, timestamp, temperature, humidity, condition in self._pending:
+            if timestamp <= self._stored_ts.get(location, -math.inf):
+                continue
+            self._stored_ts[location] = timestamp
+            buffer["ts"].append(timestamp)
+            buffer["loc"].append(self._encode(location, self._location_ids, self.locations))
+            buffer["temp"].append(math.nan if temperature is None else float(temperature))
+            buffer["hum"].append(MISSING_HUMIDITY if humidity is None else max(0, min(int(humidity), 100)))
+            buffer["cond"].append(self._encode(condition, self._condition_ids, self.conditions))
+        self._pending = []
+        self._last_ts = dict(self._stored_ts)
+
+        # The dictionary goes first: rows must never refer to ids it does not have yet.
+        if (len(self.locations), len(self.conditions)) != dictionary_size:
+            temp_path = self._dictionary_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"locations": self.locations, "conditions": self.conditions}, f)
+            os.replace(temp_path, self._dictionary_path)
+
+        pending = len(buffer["ts"])
+        start = 0
+        while start < pending:
+            if self._active_rows >= self.segment_rows:
+                number = int(os.path.basename(self._active)[4:]) + 1
+                self._active = self._new_segment_dir(number)
+                self._active_rows = 0
+                self._active_index = _time_index((), 0)
+            count = min(pending - start, self.segment_rows - self._active_rows)
+            for name, typecode in COLUMNS:
+                with open(os.path.join(self._active, f"{name}.bin"), "ab") as f:
+                    buffer[name][start:start + count].tofile(f)
+            self._active_rows += count
+            self._update_index(buffer["ts"][start:start + count])
+            start += count
+
+    def _update_index(self, new_ts):
+        index = self._active_index
+        previous_max = index["max_ts"]
+        in_order = all(new_ts[i] <= new_ts[i + 1] for i in range(len(new_ts) - 1))
+        index["sorted"] = index["sorted"] and in_order and (previous_max is None or new_ts[0] >= previous_max)
+        index["min_ts"] = min(new_ts) if index["min_ts"] is None else min(index["min_ts"], min(new_ts))
+        index["max_ts"] = max(new_ts) if previous_max is None else max(previous_max, max(new_ts))
+        index["rows"] = self._active_rows
+        path = os.path.join(self._active, "index.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Queries ---
+
+    def _row(self, segment, i):
+        columns = segment.columns
+        temperature = columns["temp"][i]
+        humidity = columns["hum"][i]
+        return Observation(
+            self.locations[columns["loc"][i]],
+            columns["ts"][i],
+            None if math.isnan(temperature) else temperature,
+            None if humidity == MISSING_HUMIDITY else humidity,
+            self.conditions[columns["cond"][i]],
+        )
+
+    def scan(self, start=None, end=None, location=None):
+        """
+        Yields observations with start <= timestamp < end in the order they were
+        recorded (oldest first within each location), one segment mapped at a time.
+        """
+        self.flush()
+        location_id = self._location_ids.get(location) if location is not None else None
+        if location is not None and location_id is None:
+            return
+        for directory in self._segment_dirs():
+            segment = _Segment(directory)
+            try:
+                if not segment.overlaps(start, end):
+                    continue
+                ts, loc, rows = segment.columns["ts"], segment.columns["loc"], segment.rows
+                if segment.index["sorted"]:
+                    first = bisect.bisect_left(ts, start, 0, rows) if start is not None else 0
+                    last = bisect.bisect_left(ts, end, 0, rows) if end is not None else rows
+                    candidates = range(first, last)
+                else:
+                    candidates = (i for i in range(rows)
+                                  if (start is None or ts[i] >= start) and (end is None or ts[i] < end))
+                for i in candidates:
+                    if location_id is None or loc[i] == location_id:
+                        yield self._row(segment, i)
+            finally:
+                segment.close()
+
+    def downsample(self, location, start=None, end=None, bucket_seconds=3600):
+        """Temperature min/max/mean (and mean humidity) per time bucket, computed in one streaming pass."""
+        buckets = []
+        current = None
+        for obs in self.scan(start, end, location):
+            bucket_start = obs.timestamp - obs.timestamp % bucket_seconds
+            if current is None or current["start"] != bucket_start:
+                current = {"start": bucket_start, "count": 0, "temp_min": None, "temp_max": None,
+                           "_temp_sum": 0.0, "_temp_n": 0, "_hum_sum": 0, "_hum_n": 0}
+                buckets.append(current)
+            current["count"] += 1
+            if obs.temperature is not None:
+                t = obs.temperature
+                current["temp_min"] = t if current["temp_min"] is None else min(current["temp_min"], t)
+                current["temp_max"] = t if current["temp_max"] is None else max(current["temp_max"], t)
+                current["_temp_sum"] += t
+                current["_temp_n"] += 1
+            if obs.humidity is not None:
+                current["_hum_sum"] += obs.humidity
+                current["_hum_n"] += 1
+
+        for bucket in buckets:
+            temp_n, hum_n = bucket.pop("_temp_n"), bucket.pop("_hum_n")
+            temp_sum, hum_sum = bucket.pop("_temp_sum"), bucket.pop("_hum_sum")
+            bucket["temp_mean"] = temp_sum / temp_n if temp_n else None
+            bucket["humidity_mean"] = hum_sum / hum_n if hum_n else None
+        return buckets
+
+    def latest(self, location=None):
+        """
+        Most recent observation per location (or for one location), found by
+        walking backwards from the newest row until every location is seen.
+        """
+        self.flush()
+        wanted = set(range(len(self.locations))) if location is None else {self._location_ids.get(location)}
+        wanted.discard(None)
+        found = {}
+        for directory in reversed(self._segment_dirs()):
+            if not wanted:
+                break
+            segment = _Segment(directory)
+            try:
+                loc = segment.columns["loc"]
+                for i in range(segment.rows - 1, -1, -1):
+                    location_id = loc[i]
+                    if location_id in wanted:
+                        wanted.discard(location_id)
+                        observation = self._row(segment, i)
+                        found[observation.location] = observation
+                        if not wanted:
+                            break
+            finally:
+                segment.close()
+        return found
+
+
+def _format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the weather observation history.")
+    parser.add_argument("directory", help="History store directory (as passed to weather.py --history).")
+    parser.add_argument("--latest", action="store_true", help="Latest observation per location.")
+    parser.add_argument("--hourly", metavar="LOCATION", help="Hourly min/max/mean temperature for a location.")
+    parser.add_argument("--since", type=float, default=24, help="Hours of history for --hourly (default: 24).")
+    args = parser.parse_args()
+
+    history = WeatherHistory(args.directory)
+    if args.hourly:
+        start = time.time() - args.since * 3600
+        for bucket in history.downsample(args.hourly, start=start):
+            print(f"{_format_time(bucket['start'])}  n={bucket['count']:<3d} "
+                  f"min={bucket['temp_min']}  max={bucket['temp_max']}  mean={bucket['temp_mean']}")
+    else:
+        for name, obs in sorted(history.latest().items()):
+            print(f"{name:<24} {_format_time(obs.timestamp)}  {obs.temperature}°  {obs.humidity}%  {obs.condition}")
+
+
+if __name__ == "__main__":
+    main()
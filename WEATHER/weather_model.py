@@ -0,0 +1,122 @@
+"""
+Slim weather observation model.
+
+OpenWeatherMap responses are nested dicts with dozens of fields, of which the
+app uses a handful. WeatherObservation pulls those out once into a
+__slots__ object, and ObservationTable stores many observations as columns
+(arrays plus a condition dictionary) instead of a list of response dicts.
+"""
+import json
+from array import array
+
+try:
+    import orjson
+
+    def loads(raw):
+        """Decodes JSON with orjson (several times faster than the stdlib)."""
+        return orjson.loads(raw)
+except ImportError:
+    def loads(raw):
+        """Decodes JSON (install orjson for a faster decoder)."""
+        return json.loads(raw)
+
+
+class WeatherObservation:
+    __slots__ = ("location", "country", "temperature", "feels_like", "humidity",
+                 "condition", "description", "wind_speed", "timestamp")
+
+    def __init__(self, location, country, temperature, feels_like, humidity,
+                 condition, description, wind_speed, timestamp):
+        self.location = location
+        self.country = country
+        self.temperature = temperature
+        self.feels_like = feels_like
+        self.humidity = humidity
+        self.condition = condition
+        self.description = description
+        self.wind_speed = wind_speed
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, data):
+        """Extracts the fields the app uses from an OpenWeatherMap response dict."""
+        main = data.get("main") or {}
+        weather = (data.get("weather") or [{}])[0]
+        return cls(
+            data.get("name", "Unknown Location"),
+            (data.get("sys") or {}).get("country", ""),
+            main.get("temp"),
+            main.get("feels_like"),
+            main.get("humidity"),
+            weather.get("main", "N/A"),
+            weather.get("description", "N/A"),
+            (data.get("wind") or {}).get("speed"),
+            data.get("dt"),
+        )
+
+    @classmethod
+    def from_json(cls, raw):
+        """Parses a raw response body (bytes or str)."""
+        return cls.from_dict(loads(raw))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (f"WeatherObservation({self.location!r}, {self.country!r}, temperature={self.temperature}, "
+                f"humidity={self.humidity}, condition={self.condition!r})")
+
+
+class ObservationTable:
+    """
+    Column-oriented batch of observations: numeric columns are `array('d')`
+    (NaN when missing) and conditions are small ints into `conditions`.
+    """
+
+    def __init__(self):
+        self.locations = []
+        self.temperature = array("d")
+        self.humidity = array("d")
+        self.condition_codes = array("H")
+        self.conditions = []
+        self._condition_ids = {}
+        self.errors = {}
+
+    def __len__(self):
+        return len(self.locations)
+
+    def append(self, location, observation):
+        condition_id = self._condition_ids.get(observation.condition)
+        if condition_id is None:
+            condition_id = self._condition_ids[observation.condition] = len(self.conditions)
+            self.conditions.append(observation.condition)
+        self.locations.append(location)
+        self.temperature.append(_number(observation.temperature))
+        self.humidity.append(_number(observation.humidity))
+        self.condition_codes.append(condition_id)
+
+    @classmethod
+    def from_responses(cls, locations, responses):
+        """
+        Builds a table from (location, response dict) pairs.
+        Error responses are kept in `errors` (location -> message) rather than as rows.
+        """
+        table = cls()
+        for location, data in zip(locations, responses):
+            if "error" in data:
+                table.errors[location] = data["error"]
+            else:
+                table.append(location, WeatherObservation.from_dict(data))
+        return table
+
+    def condition(self, row):
+        return self.conditions[self.condition_codes[row]]
+
+    def rows(self):
+        """Yields (location, temperature, humidity, condition) tuples."""
+        for i, location in enumerate(self.locations):
+            yield location, self.temperature[i], self.humidity[i], self.condition(i)
+
+
+def _number(value):
+    return float("nan") if value is None else float(value)
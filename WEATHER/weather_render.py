@@ -0,0 +1,78 @@
+"""
+Console animation renderer for the weather app.
+
+Animations run on their own thread, so reports print right away. The frame
+shown is picked from elapsed wall-clock time rather than by counting sleeps,
+so a slow terminal drops frames instead of stretching the animation. Several
+panels (one per location) render side by side in a single refresh loop.
+"""
+import sys
+import threading
+import time
+
+
+def should_animate(requested=True, stream=None):
+    """Animate only when asked to and when writing to an interactive terminal."""
+    stream = stream or sys.stdout
+    return requested and hasattr(stream, "isatty") and stream.isatty()
+
+
+class AnimationRenderer:
+    """
+    Plays `panels` — (title, frames) pairs — side by side on one line for `duration` seconds.
+    A panel with a single frame is shown as a static icon.
+    """
+
+    def __init__(self, panels, duration=3.0, fps=1 / 0.15, stream=None):
+        self.panels = list(panels)
+        self.duration = duration
+        self.fps = fps
+        self.stream = stream or sys.stdout
+        self.widths = [max(len(title), *(len(frame) for frame in frames)) for title, frames in self.panels]
+        self._stop = threading.Event()
+        self._thread = None
+
+    def frame_line(self, elapsed):
+        """The line to display `elapsed` seconds into the animation."""
+        tick = int(elapsed * self.fps)
+        cells = [frames[tick % len(frames)].ljust(width) for (_, frames), width in zip(self.panels, self.widths)]
+        return " | ".join(cells)
+
+    def run(self):
+        """Renders on the calling thread until the duration elapses or stop() is called."""
+        if not self.panels:
+            return
+        write = self.stream.write
+        write("\n" + " | ".join(title.ljust(width) for (title, _), width in zip(self.panels, self.widths)) + "\n")
+
+        # Nothing moves (clouds, mist, ...): draw the icons once instead of holding the terminal.
+        duration = self.duration if any(len(frames) > 1 for _, frames in self.panels) else 0
+
+        write(self.frame_line(0))
+        start = time.monotonic()
+        interval = 1 / self.fps
+        while not self._stop.is_set():
+            elapsed = time.monotonic() - start
+            if elapsed >= duration:
+                break
+            write("\r" + self.frame_line(elapsed))
+            self.stream.flush()
+            # Sleep to the next frame boundary, so rendering time doesn't accumulate as drift.
+            self._stop.wait(interval - (elapsed % interval))
+
+        write("\n" + "-" * max(43, sum(self.widths) + 3 * (len(self.widths) - 1)) + "\n")
+        self.stream.flush()
+
+    def start(self):
+        """Renders on a background thread and returns immediately."""
+        self._thread = threading.Thread(target=self.run, name="weather-animation", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def stop(self):
+        self._stop.set()
+        self.wait()
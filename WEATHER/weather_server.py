@@ -0,0 +1,128 @@
+"""
+Local weather HTTP API in front of OpenWeatherMap, so clients share one API
+key's quota instead of each calling the upstream directly.
+
+    pip install aiohttp
+    python weather_server.py --port 8080
+    curl 'http://127.0.0.1:8080/weather?q=London'
+
+Concurrent requests for the same location are coalesced into one upstream
+call (single-flight). Results go through weather.py's cache. At most
+--max-upstream lookups run against the upstream at once.
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+import weather
+from weather_cache import normalize_key
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers for that key await the same result."""
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, factory):
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: one caller disconnecting must not cancel the lookup the others are waiting on.
+        return await asyncio.shield(task)
+
+
+class WeatherService:
+
+    def __init__(self, max_upstream=weather.MAX_WORKERS, coalesce=True):
+        self.coalesce = coalesce
+        self.flight = SingleFlight()
+        self.requests = 0
+        self._semaphore = asyncio.Semaphore(max_upstream)
+        weather.reserve_connections(max_upstream)
+        self._executor = ThreadPoolExecutor(max_workers=max_upstream, thread_name_prefix="weather-upstream")
+
+    async def _lookup(self, location):
+        # get_weather_data is blocking (requests + SQLite), so it runs on the bounded executor.
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, weather.get_weather_data, location)
+
+    async def get(self, location):
+        self.requests += 1
+        if not self.coalesce:
+            return await self._lookup(location)
+        return await self.flight.do(normalize_key(location, weather.UNITS), lambda: self._lookup(location))
+
+    def stats(self):
+        stats = {
+            "requests": self.requests,
+            "lookups": self.flight.calls if self.coalesce else self.requests,
+            "coalesced": self.flight.coalesced,
+        }
+        if weather.CACHE_ENABLED:
+            stats["cache"] = weather.get_cache().stats()
+        client = weather.get_client()
+        stats["upstream"] = client.stats.snapshot()
+        stats["upstream"]["circuit"] = client.breaker.state
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+async def handle_weather(request):
+    location = request.query.get("q", "").strip()
+    if not location:
+        return web.json_response({"error": "Missing 'q' query parameter."}, status=400)
+
+    data = await request.app["service"].get(location)
+    if "error" in data:
+        status = 404 if data.get("status") == 404 else 502
+        return web.json_response(data, status=status)
+    return web.json_response(data)
+
+
+async def handle_stats(request):
+    return web.json_response(request.app["service"].stats())
+
+
+def create_app(max_upstream=weather.MAX_WORKERS, coalesce=True):
+    app = web.Application()
+
+    async def on_startup(app):
+        app["service"] = WeatherService(max_upstream, coalesce)
+
+    async def on_cleanup(app):
+        app["service"].close()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get("/weather", handle_weather)
+    app.router.add_get("/stats", handle_stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local weather API with request coalescing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-upstream", type=int, default=weather.MAX_WORKERS,
+                        help="Maximum concurrent upstream lookups.")
+    args = parser.parse_args()
+
+    print(f"--- Weather API on http://{args.host}:{args.port}/weather?q=<location> ---")
+    web.run_app(create_app(args.max_upstream), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()